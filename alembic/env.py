@@ -19,11 +19,20 @@ if config.config_file_name is not None:
 target_metadata = SQLModel.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # Las vistas (materializadas) se mapean como tablas para leerlas, pero
+    # se crean a mano en su migración: --autogenerate no debe tocarlas
+    if type_ == "table" and object.info.get("is_view"):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -41,7 +50,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,104 @@
+"""catalog change feed – updated_at columns and catalog_change log
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds updated_at to category, product and productvariant, and a
+catalog_change table filled by a trigger on those three tables.  The
+log id is the cursor used by GET /catalog/changes.  Existing rows are
+seeded as INSERT entries so a client starting from cursor 0 receives
+the whole catalog.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CATALOG_TABLES = ("category", "product", "productvariant")
+
+
+def upgrade() -> None:
+    # =================================================================
+    # COLUMNAS updated_at
+    # =================================================================
+
+    for table in CATALOG_TABLES:
+        op.add_column(
+            table,
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.text("NOW()"), nullable=False),
+        )
+        op.execute(f"UPDATE {table} SET updated_at = created_at")
+
+    # =================================================================
+    # TABLA CATALOG_CHANGE
+    # =================================================================
+
+    op.create_table(
+        "catalog_change",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("entity", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("action", sa.String(length=10), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), server_default=sa.text("NOW()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.execute("""
+        INSERT INTO catalog_change (entity, entity_id, action)
+        SELECT 'category', id, 'INSERT' FROM category
+        UNION ALL
+        SELECT 'product', id, 'INSERT' FROM product
+        UNION ALL
+        SELECT 'productvariant', id, 'INSERT' FROM productvariant
+    """)
+
+    # =================================================================
+    # TRIGGER: fn_catalog_change (registro de cambios del catálogo)
+    # =================================================================
+
+    # El advisory lock serializa las escrituras al catálogo (son pocas y
+    # de administradores) para que el orden de los ids sea el orden de commit
+    # y un cliente nunca se salte un cambio que se confirmó tarde.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_catalog_change()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('catalog_change'));
+
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO catalog_change (entity, entity_id, action)
+                VALUES (TG_TABLE_NAME, OLD.id, TG_OP);
+                RETURN OLD;
+            END IF;
+
+            INSERT INTO catalog_change (entity, entity_id, action)
+            VALUES (TG_TABLE_NAME, NEW.id, TG_OP);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    for table in CATALOG_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER trg_catalog_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW
+            EXECUTE FUNCTION fn_catalog_change();
+        """)
+
+
+def downgrade() -> None:
+    for table in CATALOG_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_catalog_change ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS fn_catalog_change()")
+    op.drop_table("catalog_change")
+    for table in CATALOG_TABLES:
+        op.drop_column(table, "updated_at")
@@ -0,0 +1,45 @@
+"""order keyset indexes – (created_at, id) for paginated listings
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00.000000
+
+GET /orders pages with ORDER BY created_at DESC, id DESC and a row
+comparison on (created_at, id).  These indexes let every page (with or
+without the status / payment_status filters) be read as a single index
+range scan.  They are built CONCURRENTLY so the order table is not
+locked against checkouts while the migration runs.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_created_at_id", "order", ["created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_order_status_created_at_id", "order", ["status", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_order_payment_status_created_at_id", "order", ["payment_status", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_order_payment_status_created_at_id", "order", postgresql_concurrently=True)
+        op.drop_index("ix_order_status_created_at_id", "order", postgresql_concurrently=True)
+        op.drop_index("ix_order_created_at_id", "order", postgresql_concurrently=True)
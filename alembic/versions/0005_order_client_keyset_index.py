@@ -0,0 +1,40 @@
+"""order (client_id, id) index – paginated /orders/my-orders
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00.000000
+
+/orders/my-orders pages with WHERE client_id = ? AND id < ? ORDER BY id
+DESC.  A (client_id, id) btree serves that as one backward range scan
+(equivalent to an (client_id, id DESC) index) and also covers the
+client_id foreign key lookups, so the single-column ix_order_client_id
+is dropped.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_client_id_id", "order", ["client_id", "id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_order_client_id", "order", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_client_id", "order", ["client_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_order_client_id_id", "order", postgresql_concurrently=True)
@@ -0,0 +1,39 @@
+"""productvariant (product_id, name) unique index – batched order validation
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00.000000
+
+create_order looks up every (product_id, variant_name) pair of an order
+in a single query; this unique index serves that lookup and guarantees a
+pair resolves to exactly one variant (and therefore one price).  It also
+covers product_id lookups, so ix_productvariant_product_id is dropped.
+
+The upgrade fails if duplicated variant names already exist for a
+product; they must be renamed or removed by hand first.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "uq_productvariant_product_id_name",
+        "productvariant",
+        ["product_id", "name"],
+        unique=True,
+    )
+    op.drop_index("ix_productvariant_product_id", "productvariant")
+
+
+def downgrade() -> None:
+    op.create_index("ix_productvariant_product_id", "productvariant", ["product_id"])
+    op.drop_index("uq_productvariant_product_id_name", "productvariant")
@@ -0,0 +1,62 @@
+"""order ticket numbers from a sequence – no pre-read, no collisions
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00.000000
+
+Ticket numbers used to be computed in Python as MAX(order.id) + 1, which
+costs an extra query per order and hands the same TK-xxxx to concurrent
+checkouts.  They now come from the order_ticket_seq sequence through a
+column default, and the application reads the value back with RETURNING.
+
+The sequence starts after the highest ticket (or order id) already
+issued, so existing numbers are never reused.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE order_ticket_seq")
+    op.execute("""
+        SELECT setval(
+            'order_ticket_seq',
+            GREATEST(
+                COALESCE((SELECT MAX(id) FROM "order"), 0),
+                COALESCE((SELECT MAX(substring(ticket_number FROM '^TK-([0-9]+)$')::BIGINT) FROM "order"), 0),
+                1
+            ),
+            EXISTS (SELECT 1 FROM "order")
+        )
+    """)
+
+    # Mínimo 4 dígitos (TK-0001) sin truncar números más largos (TK-12345)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_next_ticket_number()
+        RETURNS VARCHAR AS $$
+        DECLARE
+            n BIGINT := nextval('order_ticket_seq');
+        BEGIN
+            RETURN 'TK-' || lpad(n::TEXT, GREATEST(4, length(n::TEXT)), '0');
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+        ALTER TABLE "order"
+        ALTER COLUMN ticket_number SET DEFAULT fn_next_ticket_number()
+    """)
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE "order" ALTER COLUMN ticket_number DROP DEFAULT')
+    op.execute("DROP FUNCTION IF EXISTS fn_next_ticket_number()")
+    op.execute("DROP SEQUENCE IF EXISTS order_ticket_seq")
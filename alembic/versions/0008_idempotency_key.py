@@ -0,0 +1,41 @@
+"""idempotency_key table – safe retries of POST /orders
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00.000000
+
+Stores the Idempotency-Key sent with POST /orders together with a hash
+of the request and the response that was returned, so a retried
+checkout gets the original order back instead of creating a duplicate.
+Expired keys are purged in batches with
+``python -m app.cli purge-idempotency-keys``.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idempotency_key",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=False),
+        sa.Column("response_body", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_idempotency_key_expires_at", "idempotency_key", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("idempotency_key")
@@ -0,0 +1,113 @@
+"""order events – NOTIFY from fn_audit_order for the live order stream
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00.000000
+
+fn_audit_order now publishes every audit row it writes on the
+order_events channel.  The audit row id doubles as the event id, so
+GET /orders/stream can resume a client from its Last-Event-ID by reading
+order_audit before switching to live notifications.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_audit_order()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_audit order_audit%ROWTYPE;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO order_audit (order_id, action, new_status, new_payment_status, new_total)
+                VALUES (NEW.id, 'INSERT', NEW.status, NEW.payment_status, NEW.total)
+                RETURNING * INTO v_audit;
+
+            ELSIF TG_OP = 'UPDATE' THEN
+                IF OLD.status IS DISTINCT FROM NEW.status
+                   OR OLD.payment_status IS DISTINCT FROM NEW.payment_status
+                   OR OLD.total IS DISTINCT FROM NEW.total THEN
+                    INSERT INTO order_audit (
+                        order_id, action,
+                        old_status, new_status,
+                        old_payment_status, new_payment_status,
+                        old_total, new_total
+                    )
+                    VALUES (
+                        NEW.id, 'UPDATE',
+                        OLD.status, NEW.status,
+                        OLD.payment_status, NEW.payment_status,
+                        OLD.total, NEW.total
+                    )
+                    RETURNING * INTO v_audit;
+                END IF;
+
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO order_audit (order_id, action, old_status, old_payment_status, old_total)
+                VALUES (OLD.id, 'DELETE', OLD.status, OLD.payment_status, OLD.total)
+                RETURNING * INTO v_audit;
+            END IF;
+
+            -- La notificación se entrega solo si la transacción hace commit
+            IF v_audit.id IS NOT NULL THEN
+                PERFORM pg_notify('order_events', row_to_json(v_audit)::TEXT);
+            END IF;
+
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_audit_order()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO order_audit (order_id, action, new_status, new_payment_status, new_total)
+                VALUES (NEW.id, 'INSERT', NEW.status, NEW.payment_status, NEW.total);
+                RETURN NEW;
+
+            ELSIF TG_OP = 'UPDATE' THEN
+                IF OLD.status IS DISTINCT FROM NEW.status
+                   OR OLD.payment_status IS DISTINCT FROM NEW.payment_status
+                   OR OLD.total IS DISTINCT FROM NEW.total THEN
+                    INSERT INTO order_audit (
+                        order_id, action,
+                        old_status, new_status,
+                        old_payment_status, new_payment_status,
+                        old_total, new_total
+                    )
+                    VALUES (
+                        NEW.id, 'UPDATE',
+                        OLD.status, NEW.status,
+                        OLD.payment_status, NEW.payment_status,
+                        OLD.total, NEW.total
+                    );
+                END IF;
+                RETURN NEW;
+
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO order_audit (order_id, action, old_status, old_payment_status, old_total)
+                VALUES (OLD.id, 'DELETE', OLD.status, OLD.payment_status, OLD.total);
+                RETURN OLD;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
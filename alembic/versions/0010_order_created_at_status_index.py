@@ -0,0 +1,35 @@
+"""order (created_at, status) index – single-pass sales summary
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:00.000000
+
+GET /reports/sales-summary reads every order of a date range once and
+aggregates status, payment_status and total with FILTER clauses.  This
+index turns that read into a range scan, and INCLUDE (payment_status,
+total) lets Postgres answer it with an index-only scan.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_created_at_status", "order", ["created_at", "status"],
+            postgresql_include=["payment_status", "total"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_order_created_at_status", "order", postgresql_concurrently=True)
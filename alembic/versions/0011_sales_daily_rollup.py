@@ -0,0 +1,188 @@
+"""sales_daily rollup – incremental daily sales totals
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 00:00:00.000000
+
+One row per (day, status, payment_status) with the number of orders,
+their revenue and the number of items sold.  Triggers on "order" and
+orderdetail keep it current: every write moves the order's contribution
+from its old bucket to its new one with an INSERT ... ON CONFLICT
+upsert, so GET /reports/sales-timeseries never reads raw orders.
+The table is filled from history here and can be recomputed at any
+time with ``python -m app.cli rebuild-sales-daily``.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0011"
+down_revision: Union[str, Sequence[str], None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # =================================================================
+    # TABLA SALES_DAILY
+    # =================================================================
+
+    op.create_table(
+        "sales_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status", postgresql.ENUM(name="orderstatus", create_type=False), nullable=False),
+        sa.Column("payment_status", postgresql.ENUM(name="paymentstatus", create_type=False), nullable=False),
+        sa.Column("order_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("revenue", sa.Numeric(precision=14, scale=2), server_default="0", nullable=False),
+        sa.Column("item_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("day", "status", "payment_status"),
+    )
+
+    # =================================================================
+    # FUNCIÓN: fn_sales_daily_add (suma o resta de un bucket)
+    # =================================================================
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sales_daily_add(
+            p_day DATE,
+            p_status orderstatus,
+            p_payment_status paymentstatus,
+            p_orders BIGINT,
+            p_revenue NUMERIC,
+            p_items BIGINT
+        )
+        RETURNS VOID AS $$
+        BEGIN
+            INSERT INTO sales_daily AS s (day, status, payment_status, order_count, revenue, item_count)
+            VALUES (p_day, p_status, p_payment_status, p_orders, p_revenue, p_items)
+            ON CONFLICT (day, status, payment_status) DO UPDATE
+            SET order_count = s.order_count + EXCLUDED.order_count,
+                revenue = s.revenue + EXCLUDED.revenue,
+                item_count = s.item_count + EXCLUDED.item_count;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # =================================================================
+    # TRIGGER: fn_sales_daily_order (altas, cambios y bajas de órdenes)
+    # =================================================================
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sales_daily_order()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_items BIGINT;
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND OLD.created_at::DATE = NEW.created_at::DATE
+               AND OLD.status = NEW.status
+               AND OLD.payment_status = NEW.payment_status
+               AND OLD.total = NEW.total THEN
+                RETURN NULL;
+            END IF;
+
+            SELECT COALESCE(SUM(quantity), 0) INTO v_items
+            FROM orderdetail
+            WHERE order_id = COALESCE(NEW.id, OLD.id);
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM fn_sales_daily_add(
+                    OLD.created_at::DATE, OLD.status, OLD.payment_status, -1, -OLD.total, -v_items
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM fn_sales_daily_add(
+                    NEW.created_at::DATE, NEW.status, NEW.payment_status, 1, NEW.total, v_items
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_sales_daily_order
+        AFTER INSERT OR UPDATE OR DELETE ON "order"
+        FOR EACH ROW
+        EXECUTE FUNCTION fn_sales_daily_order();
+    """)
+
+    # =================================================================
+    # TRIGGER: fn_sales_daily_detail (artículos vendidos)
+    # =================================================================
+
+    # Los detalles se insertan después de la orden y se borran antes que
+    # ella, así que solo ajustan item_count del bucket actual de su orden.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sales_daily_detail()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_order RECORD;
+            v_delta BIGINT;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                v_delta := NEW.quantity;
+            ELSIF TG_OP = 'DELETE' THEN
+                v_delta := -OLD.quantity;
+            ELSIF OLD.order_id = NEW.order_id THEN
+                v_delta := NEW.quantity - OLD.quantity;
+            ELSE
+                -- El detalle cambió de orden: se trata como baja + alta
+                SELECT created_at, status, payment_status INTO v_order FROM "order" WHERE id = OLD.order_id;
+                IF FOUND THEN
+                    PERFORM fn_sales_daily_add(
+                        v_order.created_at::DATE, v_order.status, v_order.payment_status, 0, 0, -OLD.quantity
+                    );
+                END IF;
+                v_delta := NEW.quantity;
+            END IF;
+
+            IF v_delta = 0 THEN
+                RETURN NULL;
+            END IF;
+
+            SELECT created_at, status, payment_status INTO v_order
+            FROM "order"
+            WHERE id = COALESCE(NEW.order_id, OLD.order_id);
+            IF FOUND THEN
+                PERFORM fn_sales_daily_add(
+                    v_order.created_at::DATE, v_order.status, v_order.payment_status, 0, 0, v_delta
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_sales_daily_detail
+        AFTER INSERT OR UPDATE OF order_id, quantity OR DELETE ON orderdetail
+        FOR EACH ROW
+        EXECUTE FUNCTION fn_sales_daily_detail();
+    """)
+
+    # =================================================================
+    # CARGA INICIAL DESDE EL HISTÓRICO
+    # =================================================================
+
+    op.execute("""
+        INSERT INTO sales_daily (day, status, payment_status, order_count, revenue, item_count)
+        SELECT o.created_at::DATE, o.status, o.payment_status,
+               COUNT(*), SUM(o.total), COALESCE(SUM(d.items), 0)
+        FROM "order" o
+        LEFT JOIN (
+            SELECT order_id, SUM(quantity) AS items FROM orderdetail GROUP BY order_id
+        ) d ON d.order_id = o.id
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_sales_daily_detail ON orderdetail")
+    op.execute("DROP TRIGGER IF EXISTS trg_sales_daily_order ON \"order\"")
+    op.execute("DROP FUNCTION IF EXISTS fn_sales_daily_detail()")
+    op.execute("DROP FUNCTION IF EXISTS fn_sales_daily_order()")
+    op.execute(
+        "DROP FUNCTION IF EXISTS fn_sales_daily_add(DATE, orderstatus, paymentstatus, BIGINT, NUMERIC, BIGINT)"
+    )
+    op.drop_table("sales_daily")
@@ -0,0 +1,64 @@
+"""mv_best_sellers materialized view – best-sellers ranking
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 00:00:00.000000
+
+Quantity sold per day, product and variant (cancelled orders excluded).
+GET /products/best-sellers only reads this view; it is refreshed
+CONCURRENTLY by the in-process scheduler or with
+``python -m app.cli refresh-best-sellers``, so reads never wait on the
+aggregation.  The unique index is required by REFRESH ... CONCURRENTLY.
+materialized_view_refresh records when each view was last refreshed.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0012"
+down_revision: Union[str, Sequence[str], None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "materialized_view_refresh",
+        sa.Column("view_name", sa.String(length=63), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("view_name"),
+    )
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_best_sellers AS
+        SELECT o.created_at::DATE AS day,
+               d.product_id,
+               d.variant_name,
+               p.category_id,
+               SUM(d.quantity)::BIGINT AS quantity
+        FROM orderdetail d
+        JOIN "order" o ON o.id = d.order_id
+        JOIN product p ON p.id = d.product_id
+        WHERE o.status <> 'cancelado'
+        GROUP BY 1, 2, 3, 4
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ux_mv_best_sellers_day_product_variant "
+        "ON mv_best_sellers (day, product_id, variant_name)"
+    )
+    op.execute(
+        "CREATE INDEX ix_mv_best_sellers_category_id_day "
+        "ON mv_best_sellers (category_id, day)"
+    )
+    op.execute("""
+        INSERT INTO materialized_view_refresh (view_name, refreshed_at)
+        VALUES ('mv_best_sellers', NOW() AT TIME ZONE 'UTC')
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_best_sellers")
+    op.drop_table("materialized_view_refresh")
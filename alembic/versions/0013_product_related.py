@@ -0,0 +1,39 @@
+"""product_related table – "frequently bought together"
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17 00:00:00.000000
+
+Top-K neighbours per product computed from order co-occurrence by
+``python -m app.cli compute-related-products``.  The primary key
+(product_id, rank) makes GET /products/{product_id}/related a single
+index range scan.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0013"
+down_revision: Union[str, Sequence[str], None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_related",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("related_product_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["product.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["related_product_id"], ["product.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("product_id", "rank"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_related")
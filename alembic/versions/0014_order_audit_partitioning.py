@@ -0,0 +1,169 @@
+"""order_audit partitioned by month – retention and timeline index
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17 00:00:00.000000
+
+order_audit becomes a table partitioned by RANGE (changed_at), one
+partition per month (order_audit_pYYYYMM) plus a DEFAULT partition as a
+safety net.  The primary key is (id, changed_at) and the only other
+index is (order_id, changed_at, id), which serves the keyset-paginated
+GET /orders/{order_id}/audit; the old order_id/action/changed_at indexes
+are gone.  ids keep coming from order_audit_id_seq, so the order stream
+cursor (Last-Event-ID) stays valid.
+
+fn_order_audit_create_partitions() and fn_order_audit_drop_partitions()
+are called by ``python -m app.cli maintain-order-audit`` and by the
+in-process scheduler to keep a few months of partitions ahead and drop
+the ones older than ORDER_AUDIT_RETENTION_MONTHS.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0014"
+down_revision: Union[str, Sequence[str], None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AUDIT_COLUMNS = (
+    "id, order_id, action, old_status, new_status, old_payment_status, "
+    "new_payment_status, old_total, new_total, changed_at, changed_by"
+)
+
+
+def _audit_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('order_audit_id_seq')"), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("action", sa.String(length=10), nullable=False),
+        sa.Column("old_status", sa.String(length=50), nullable=True),
+        sa.Column("new_status", sa.String(length=50), nullable=True),
+        sa.Column("old_payment_status", sa.String(length=50), nullable=True),
+        sa.Column("new_payment_status", sa.String(length=50), nullable=True),
+        sa.Column("old_total", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("new_total", sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column("changed_at", sa.DateTime(), server_default=sa.text("NOW()"), nullable=False),
+        sa.Column("changed_by", sa.String(length=100), server_default=sa.text("current_user"), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    # =================================================================
+    # TABLA ORDER_AUDIT PARTICIONADA
+    # =================================================================
+
+    # La tabla vieja se renombra (con su PK) y se borran sus índices para
+    # liberar los nombres; la secuencia de ids se comparte con la nueva
+    op.execute("ALTER TABLE order_audit RENAME TO order_audit_old")
+    op.execute("ALTER TABLE order_audit_old RENAME CONSTRAINT order_audit_pkey TO order_audit_old_pkey")
+    op.drop_index("ix_order_audit_order_id", "order_audit_old")
+    op.drop_index("ix_order_audit_action", "order_audit_old")
+    op.drop_index("ix_order_audit_changed_at", "order_audit_old")
+
+    op.create_table(
+        "order_audit",
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint("id", "changed_at"),
+        postgresql_partition_by="RANGE (changed_at)",
+    )
+    op.create_index(
+        "ix_order_audit_order_id_changed_at_id", "order_audit", ["order_id", "changed_at", "id"]
+    )
+    op.execute("ALTER SEQUENCE order_audit_id_seq OWNED BY order_audit.id")
+    op.execute("CREATE TABLE order_audit_default PARTITION OF order_audit DEFAULT")
+
+    # =================================================================
+    # FUNCIONES DE MANTENIMIENTO DE PARTICIONES
+    # =================================================================
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_order_audit_create_partitions(p_from DATE, p_to DATE)
+        RETURNS INTEGER AS $$
+        DECLARE
+            v_month DATE := date_trunc('month', p_from)::DATE;
+            v_name TEXT;
+            v_created INTEGER := 0;
+        BEGIN
+            WHILE v_month <= p_to LOOP
+                v_name := format('order_audit_p%s', to_char(v_month, 'YYYYMM'));
+                IF to_regclass(v_name) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF order_audit FOR VALUES FROM (%L) TO (%L)',
+                        v_name, v_month, (v_month + INTERVAL '1 month')::DATE
+                    );
+                    v_created := v_created + 1;
+                END IF;
+                v_month := (v_month + INTERVAL '1 month')::DATE;
+            END LOOP;
+            RETURN v_created;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Borra las particiones mensuales que terminan antes de p_before
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_order_audit_drop_partitions(p_before DATE)
+        RETURNS INTEGER AS $$
+        DECLARE
+            v_partition RECORD;
+            v_dropped INTEGER := 0;
+        BEGIN
+            FOR v_partition IN
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'order_audit'::REGCLASS
+                  AND c.relname ~ '^order_audit_p[0-9]{6}$'
+                  AND to_date(substring(c.relname FROM 14), 'YYYYMM') + INTERVAL '1 month' <= p_before
+                ORDER BY c.relname
+            LOOP
+                EXECUTE format('ALTER TABLE order_audit DETACH PARTITION %I', v_partition.relname);
+                EXECUTE format('DROP TABLE %I', v_partition.relname);
+                v_dropped := v_dropped + 1;
+            END LOOP;
+            RETURN v_dropped;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # =================================================================
+    # COPIA DEL HISTÓRICO
+    # =================================================================
+
+    # Particiones desde el registro más viejo hasta tres meses adelante
+    op.execute("""
+        SELECT fn_order_audit_create_partitions(
+            COALESCE((SELECT MIN(changed_at) FROM order_audit_old)::DATE, CURRENT_DATE),
+            (CURRENT_DATE + INTERVAL '3 months')::DATE
+        )
+    """)
+    op.execute(f"INSERT INTO order_audit ({AUDIT_COLUMNS}) SELECT {AUDIT_COLUMNS} FROM order_audit_old")
+    op.drop_table("order_audit_old")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE order_audit RENAME TO order_audit_partitioned")
+    op.execute(
+        "ALTER TABLE order_audit_partitioned "
+        "RENAME CONSTRAINT order_audit_pkey TO order_audit_partitioned_pkey"
+    )
+    op.create_table(
+        "order_audit",
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        f"INSERT INTO order_audit ({AUDIT_COLUMNS}) "
+        f"SELECT {AUDIT_COLUMNS} FROM order_audit_partitioned"
+    )
+    op.execute("ALTER SEQUENCE order_audit_id_seq OWNED BY order_audit.id")
+    op.execute("DROP TABLE order_audit_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS fn_order_audit_drop_partitions(DATE)")
+    op.execute("DROP FUNCTION IF EXISTS fn_order_audit_create_partitions(DATE, DATE)")
+    op.create_index("ix_order_audit_order_id", "order_audit", ["order_id"])
+    op.create_index("ix_order_audit_action", "order_audit", ["action"])
+    op.create_index("ix_order_audit_changed_at", "order_audit", ["changed_at"])
@@ -0,0 +1,199 @@
+"""statement-level order audit triggers
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-17 00:00:00.000000
+
+trg_audit_order was a FOR EACH ROW trigger, so a bulk UPDATE of N orders
+called fn_audit_order N times.  It is replaced by three FOR EACH
+STATEMENT triggers (Postgres allows transition tables only on
+single-event triggers) that write every audit row of the statement with
+one INSERT ... SELECT over the OLD/NEW transition tables, and publish
+the same per-row NOTIFY on order_events as before.
+
+trg_estado_segun_pago has to stay row-level because it modifies NEW;
+it gets a WHEN clause so the function is only called for the rows it
+actually changes.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0015"
+down_revision: Union[str, Sequence[str], None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # =================================================================
+    # TRIGGER: fn_audit_order (por sentencia, con tablas de transición)
+    # =================================================================
+
+    # Cada rama solo usa las tablas de transición de su evento; la
+    # notificación sale de las filas que devuelve el mismo INSERT
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_audit_order ON "order";
+
+        CREATE OR REPLACE FUNCTION fn_audit_order()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_count INTEGER;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                WITH audit AS (
+                    INSERT INTO order_audit (order_id, action, new_status, new_payment_status, new_total)
+                    SELECT n.id, 'INSERT', n.status, n.payment_status, n.total
+                    FROM new_orders n
+                    ORDER BY n.id
+                    RETURNING *
+                )
+                SELECT COUNT(*) INTO v_count
+                FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+
+            ELSIF TG_OP = 'UPDATE' THEN
+                WITH audit AS (
+                    INSERT INTO order_audit (
+                        order_id, action,
+                        old_status, new_status,
+                        old_payment_status, new_payment_status,
+                        old_total, new_total
+                    )
+                    SELECT n.id, 'UPDATE',
+                           o.status, n.status,
+                           o.payment_status, n.payment_status,
+                           o.total, n.total
+                    FROM new_orders n
+                    JOIN old_orders o ON o.id = n.id
+                    WHERE o.status IS DISTINCT FROM n.status
+                       OR o.payment_status IS DISTINCT FROM n.payment_status
+                       OR o.total IS DISTINCT FROM n.total
+                    ORDER BY n.id
+                    RETURNING *
+                )
+                SELECT COUNT(*) INTO v_count
+                FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+
+            ELSIF TG_OP = 'DELETE' THEN
+                WITH audit AS (
+                    INSERT INTO order_audit (order_id, action, old_status, old_payment_status, old_total)
+                    SELECT o.id, 'DELETE', o.status, o.payment_status, o.total
+                    FROM old_orders o
+                    ORDER BY o.id
+                    RETURNING *
+                )
+                SELECT COUNT(*) INTO v_count
+                FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_audit_order_insert
+        AFTER INSERT ON "order"
+        REFERENCING NEW TABLE AS new_orders
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_audit_order();
+
+        CREATE TRIGGER trg_audit_order_update
+        AFTER UPDATE ON "order"
+        REFERENCING OLD TABLE AS old_orders NEW TABLE AS new_orders
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_audit_order();
+
+        CREATE TRIGGER trg_audit_order_delete
+        AFTER DELETE ON "order"
+        REFERENCING OLD TABLE AS old_orders
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_audit_order();
+    """)
+
+    # =================================================================
+    # TRIGGER: fn_estado_segun_pago (solo filas que se auto-confirman)
+    # =================================================================
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_estado_segun_pago ON "order";
+
+        CREATE TRIGGER trg_estado_segun_pago
+        BEFORE UPDATE ON "order"
+        FOR EACH ROW
+        WHEN (
+            OLD.payment_status IS DISTINCT FROM NEW.payment_status
+            AND NEW.payment_status = 'pagado'
+            AND NEW.status = 'pendiente'
+        )
+        EXECUTE FUNCTION fn_estado_segun_pago();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_estado_segun_pago ON "order";
+
+        CREATE TRIGGER trg_estado_segun_pago
+        BEFORE UPDATE ON "order"
+        FOR EACH ROW
+        EXECUTE FUNCTION fn_estado_segun_pago();
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_audit_order_insert ON "order";
+        DROP TRIGGER IF EXISTS trg_audit_order_update ON "order";
+        DROP TRIGGER IF EXISTS trg_audit_order_delete ON "order";
+
+        CREATE OR REPLACE FUNCTION fn_audit_order()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_audit order_audit%ROWTYPE;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO order_audit (order_id, action, new_status, new_payment_status, new_total)
+                VALUES (NEW.id, 'INSERT', NEW.status, NEW.payment_status, NEW.total)
+                RETURNING * INTO v_audit;
+
+            ELSIF TG_OP = 'UPDATE' THEN
+                IF OLD.status IS DISTINCT FROM NEW.status
+                   OR OLD.payment_status IS DISTINCT FROM NEW.payment_status
+                   OR OLD.total IS DISTINCT FROM NEW.total THEN
+                    INSERT INTO order_audit (
+                        order_id, action,
+                        old_status, new_status,
+                        old_payment_status, new_payment_status,
+                        old_total, new_total
+                    )
+                    VALUES (
+                        NEW.id, 'UPDATE',
+                        OLD.status, NEW.status,
+                        OLD.payment_status, NEW.payment_status,
+                        OLD.total, NEW.total
+                    )
+                    RETURNING * INTO v_audit;
+                END IF;
+
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO order_audit (order_id, action, old_status, old_payment_status, old_total)
+                VALUES (OLD.id, 'DELETE', OLD.status, OLD.payment_status, OLD.total)
+                RETURNING * INTO v_audit;
+            END IF;
+
+            -- La notificación se entrega solo si la transacción hace commit
+            IF v_audit.id IS NOT NULL THEN
+                PERFORM pg_notify('order_events', row_to_json(v_audit)::TEXT);
+            END IF;
+
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_audit_order
+        AFTER INSERT OR UPDATE OR DELETE ON "order"
+        FOR EACH ROW
+        EXECUTE FUNCTION fn_audit_order();
+    """)
@@ -0,0 +1,49 @@
+"""email_outbox table – transactional email queue
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-17 00:00:00.000000
+
+Emails are inserted here in the same transaction as the request that
+triggers them (register, resend-verification, forgot-password) and sent
+in batches by a background job that claims rows with
+FOR UPDATE SKIP LOCKED.  The partial index only covers pending rows,
+which is all the sender ever reads.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0016"
+down_revision: Union[str, Sequence[str], None] = "0015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("sender", sa.String(length=255), nullable=False),
+        sa.Column("to_email", sa.String(length=255), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("html", sa.String(), nullable=False),
+        sa.Column("status", sa.String(length=10), server_default="pending", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_email_outbox_pending", "email_outbox", ["next_attempt_at", "id"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("email_outbox")
@@ -0,0 +1,46 @@
+"""client_cart_item (client_id, product_id) unique index – upsert cart sync
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-17 00:00:00.000000
+
+PUT /clients/cart applies the whole cart with one
+INSERT ... ON CONFLICT (client_id, product_id) DO UPDATE plus one
+DELETE, which needs this unique index.  It also covers client_id
+lookups, so ix_client_cart_item_client_id is dropped.
+
+Carts saved by the old delete-and-reinsert sync can hold the same
+product twice; only the newest row of each pair is kept.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0017"
+down_revision: Union[str, Sequence[str], None] = "0016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM client_cart_item c
+        USING client_cart_item newer
+        WHERE newer.client_id = c.client_id
+          AND newer.product_id = c.product_id
+          AND newer.id > c.id
+    """)
+    op.create_index(
+        "uq_client_cart_item_client_id_product_id",
+        "client_cart_item",
+        ["client_id", "product_id"],
+        unique=True,
+    )
+    op.drop_index("ix_client_cart_item_client_id", "client_cart_item")
+
+
+def downgrade() -> None:
+    op.create_index("ix_client_cart_item_client_id", "client_cart_item", ["client_id"])
+    op.drop_index("uq_client_cart_item_client_id_product_id", "client_cart_item")
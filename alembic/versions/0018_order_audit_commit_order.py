@@ -0,0 +1,97 @@
+"""order_audit ids in commit order – no gaps in the order stream
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-17 00:00:00.000000
+
+order_audit ids come from a sequence, so a transaction that takes a
+lower id and commits later was skipped by GET /orders/stream clients
+(live and on a Last-Event-ID resume), which only move forward by id.
+fn_audit_order now takes a transaction-level advisory lock before
+writing, the same way fn_catalog_change does for catalog_change, so
+audit ids are handed out in commit order.  The lock is only held from
+the first audited statement on "order" until that transaction ends.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0018"
+down_revision: Union[str, Sequence[str], None] = "0017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Cuerpo de fn_audit_order de la migración 0015; LOCK marca dónde va el advisory lock
+AUDIT_FUNCTION = """
+    CREATE OR REPLACE FUNCTION fn_audit_order()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        v_count INTEGER;
+    BEGIN
+        LOCK
+        IF TG_OP = 'INSERT' THEN
+            WITH audit AS (
+                INSERT INTO order_audit (order_id, action, new_status, new_payment_status, new_total)
+                SELECT n.id, 'INSERT', n.status, n.payment_status, n.total
+                FROM new_orders n
+                ORDER BY n.id
+                RETURNING *
+            )
+            SELECT COUNT(*) INTO v_count
+            FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+
+        ELSIF TG_OP = 'UPDATE' THEN
+            WITH audit AS (
+                INSERT INTO order_audit (
+                    order_id, action,
+                    old_status, new_status,
+                    old_payment_status, new_payment_status,
+                    old_total, new_total
+                )
+                SELECT n.id, 'UPDATE',
+                       o.status, n.status,
+                       o.payment_status, n.payment_status,
+                       o.total, n.total
+                FROM new_orders n
+                JOIN old_orders o ON o.id = n.id
+                WHERE o.status IS DISTINCT FROM n.status
+                   OR o.payment_status IS DISTINCT FROM n.payment_status
+                   OR o.total IS DISTINCT FROM n.total
+                ORDER BY n.id
+                RETURNING *
+            )
+            SELECT COUNT(*) INTO v_count
+            FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+
+        ELSIF TG_OP = 'DELETE' THEN
+            WITH audit AS (
+                INSERT INTO order_audit (order_id, action, old_status, old_payment_status, old_total)
+                SELECT o.id, 'DELETE', o.status, o.payment_status, o.total
+                FROM old_orders o
+                ORDER BY o.id
+                RETURNING *
+            )
+            SELECT COUNT(*) INTO v_count
+            FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    # El advisory lock serializa las transacciones que escriben en
+    # order_audit hasta su commit: el orden de los ids es el orden de commit
+    # y un cliente del stream nunca se salta un evento que se confirmó tarde.
+    op.execute(AUDIT_FUNCTION.replace(
+        "LOCK", "PERFORM pg_advisory_xact_lock(hashtext('order_audit'));\n"
+    ))
+
+
+def downgrade() -> None:
+    op.execute(AUDIT_FUNCTION.replace("LOCK", ""))
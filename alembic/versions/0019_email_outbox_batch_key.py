@@ -0,0 +1,34 @@
+"""email_outbox.batch_key – stable idempotency key per batch
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-17 00:00:00.000000
+
+The sender used "email-outbox-" plus every id of the batch as the
+Resend idempotency key, which grows with the batch size and changes
+whenever a retry picks up a different set of rows.  Each batch now gets
+a fixed-length key (sha256 of its sorted ids) that is stored on its
+rows before anything is sent, and a failed batch is always retried as
+the same set of rows with the same key.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0019"
+down_revision: Union[str, Sequence[str], None] = "0018"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("email_outbox", sa.Column("batch_key", sa.String(length=64), nullable=True))
+    op.create_index("ix_email_outbox_batch_key_id", "email_outbox", ["batch_key", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_outbox_batch_key_id", "email_outbox")
+    op.drop_column("email_outbox", "batch_key")
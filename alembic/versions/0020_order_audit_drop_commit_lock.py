@@ -0,0 +1,94 @@
+"""drop the order_audit advisory lock – stream resume replays an overlap window
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-17 00:00:00.000000
+
+0018 made fn_audit_order take one global advisory lock held until
+commit, so audit ids would follow commit order.  That serialized every
+transaction writing an order (checkout, bulk updates, status changes).
+The lock is dropped again; GET /orders/stream instead replays, on a
+Last-Event-ID resume, the events of the previous
+STREAM_RESUME_OVERLAP_SECONDS before that id, which covers audit rows
+that took a lower id and committed late.  Clients drop ids they already
+have.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0020"
+down_revision: Union[str, Sequence[str], None] = "0019"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Cuerpo de fn_audit_order de la migración 0015, sin advisory lock
+AUDIT_FUNCTION = """
+    CREATE OR REPLACE FUNCTION fn_audit_order()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        v_count INTEGER;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            WITH audit AS (
+                INSERT INTO order_audit (order_id, action, new_status, new_payment_status, new_total)
+                SELECT n.id, 'INSERT', n.status, n.payment_status, n.total
+                FROM new_orders n
+                ORDER BY n.id
+                RETURNING *
+            )
+            SELECT COUNT(*) INTO v_count
+            FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+
+        ELSIF TG_OP = 'UPDATE' THEN
+            WITH audit AS (
+                INSERT INTO order_audit (
+                    order_id, action,
+                    old_status, new_status,
+                    old_payment_status, new_payment_status,
+                    old_total, new_total
+                )
+                SELECT n.id, 'UPDATE',
+                       o.status, n.status,
+                       o.payment_status, n.payment_status,
+                       o.total, n.total
+                FROM new_orders n
+                JOIN old_orders o ON o.id = n.id
+                WHERE o.status IS DISTINCT FROM n.status
+                   OR o.payment_status IS DISTINCT FROM n.payment_status
+                   OR o.total IS DISTINCT FROM n.total
+                ORDER BY n.id
+                RETURNING *
+            )
+            SELECT COUNT(*) INTO v_count
+            FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+
+        ELSIF TG_OP = 'DELETE' THEN
+            WITH audit AS (
+                INSERT INTO order_audit (order_id, action, old_status, old_payment_status, old_total)
+                SELECT o.id, 'DELETE', o.status, o.payment_status, o.total
+                FROM old_orders o
+                ORDER BY o.id
+                RETURNING *
+            )
+            SELECT COUNT(*) INTO v_count
+            FROM (SELECT pg_notify('order_events', row_to_json(audit)::TEXT) FROM audit) notified;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.execute(AUDIT_FUNCTION)
+
+
+def downgrade() -> None:
+    op.execute(AUDIT_FUNCTION.replace(
+        "BEGIN\n", "BEGIN\n        PERFORM pg_advisory_xact_lock(hashtext('order_audit'));\n", 1
+    ))
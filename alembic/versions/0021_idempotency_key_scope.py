@@ -0,0 +1,45 @@
+"""idempotency_key scoped to the caller
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-17 00:00:00.000000
+
+Idempotency keys were global, so a key sent by one client could replay
+another client's POST /orders response.  The primary key becomes
+(scope, key), where scope is ``client:<id>``, ``user:<id>`` or
+``anonymous`` depending on the bearer token of the request.  Keys
+already stored have no known owner and are kept as ``anonymous``.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0021"
+down_revision: Union[str, Sequence[str], None] = "0020"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "idempotency_key",
+        sa.Column("scope", sa.String(length=64), server_default="anonymous", nullable=False),
+    )
+    op.alter_column("idempotency_key", "scope", server_default=None)
+    op.drop_constraint("idempotency_key_pkey", "idempotency_key", type_="primary")
+    op.create_primary_key("idempotency_key_pkey", "idempotency_key", ["scope", "key"])
+
+
+def downgrade() -> None:
+    # Sin ámbito solo puede quedar una fila por llave
+    op.execute("""
+        DELETE FROM idempotency_key k
+        USING idempotency_key other
+        WHERE other.key = k.key AND other.scope < k.scope
+    """)
+    op.drop_constraint("idempotency_key_pkey", "idempotency_key", type_="primary")
+    op.create_primary_key("idempotency_key_pkey", "idempotency_key", ["key"])
+    op.drop_column("idempotency_key", "scope")
@@ -0,0 +1,32 @@
+"""client_cart_item quantity > 0 check
+
+Revision ID: 0022
+Revises: 0021
+Create Date: 2026-10-17 00:00:00.000000
+
+PUT /clients/cart accepted any integer quantity, and the gt=0 on the
+model is not enforced for table models, so a cart could be checked out
+into order lines with zero or negative quantities and totals.  Rows
+saved that way are removed and a CHECK constraint keeps them out.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0022"
+down_revision: Union[str, Sequence[str], None] = "0021"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("DELETE FROM client_cart_item WHERE quantity <= 0")
+    op.create_check_constraint(
+        "ck_client_cart_item_quantity_positive", "client_cart_item", "quantity > 0"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_client_cart_item_quantity_positive", "client_cart_item", type_="check")
@@ -0,0 +1,44 @@
+"""ix_order_created_at_status also includes id – index-only sales summary
+
+Revision ID: 0023
+Revises: 0022
+Create Date: 2026-10-17 00:00:00.000000
+
+The orders_in_range CTE of GET /reports/sales-summary selects
+order.id (to join the details for the top product), which 0010 left
+out of the index, so every order of the range still needed a heap
+fetch.  The index is rebuilt with INCLUDE (payment_status, total, id).
+The new one is built concurrently under a temporary name before the
+old one is dropped, so the range read never loses its index.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0023"
+down_revision: Union[str, Sequence[str], None] = "0022"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rebuild(include: list[str]) -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_created_at_status_new", "order", ["created_at", "status"],
+            postgresql_include=include,
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_order_created_at_status", "order", postgresql_concurrently=True)
+        op.execute(
+            "ALTER INDEX ix_order_created_at_status_new RENAME TO ix_order_created_at_status"
+        )
+
+
+def upgrade() -> None:
+    _rebuild(["payment_status", "total", "id"])
+
+
+def downgrade() -> None:
+    _rebuild(["payment_status", "total"])
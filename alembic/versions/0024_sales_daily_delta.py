@@ -0,0 +1,323 @@
+"""sales_daily_delta – append-only sales deltas folded into sales_daily
+
+Revision ID: 0024
+Revises: 0023
+Create Date: 2026-10-17 00:00:00.000000
+
+The 0011 triggers were FOR EACH ROW and upserted straight into
+sales_daily, so every order write of a day updated the same few
+(day, status, payment_status) rows: concurrent checkouts queued on
+those row locks, and two transactions touching the same buckets in a
+different order deadlocked.  They are replaced by FOR EACH STATEMENT
+triggers that aggregate the transition tables and only INSERT into
+sales_daily_delta, which takes no lock on shared rows.  A periodic job
+(``python -m app.cli fold-sales-daily``) moves the deltas into
+sales_daily in key order, and the reports read both tables.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0024"
+down_revision: Union[str, Sequence[str], None] = "0023"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # =================================================================
+    # TABLA SALES_DAILY_DELTA
+    # =================================================================
+
+    op.create_table(
+        "sales_daily_delta",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status", postgresql.ENUM(name="orderstatus", create_type=False), nullable=False),
+        sa.Column("payment_status", postgresql.ENUM(name="paymentstatus", create_type=False), nullable=False),
+        sa.Column("order_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("revenue", sa.Numeric(precision=14, scale=2), server_default="0", nullable=False),
+        sa.Column("item_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_sales_daily_order ON "order";
+        DROP TRIGGER IF EXISTS trg_sales_daily_detail ON orderdetail;
+        DROP FUNCTION IF EXISTS fn_sales_daily_order();
+        DROP FUNCTION IF EXISTS fn_sales_daily_detail();
+        DROP FUNCTION IF EXISTS fn_sales_daily_add(DATE, orderstatus, paymentstatus, BIGINT, NUMERIC, BIGINT);
+    """)
+
+    # =================================================================
+    # TRIGGER: fn_sales_daily_delta_order (por sentencia)
+    # =================================================================
+
+    # Un INSERT por sentencia con un delta por bucket; un UPDATE resta el
+    # bucket viejo y suma el nuevo de cada orden que cambió de bucket o total
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sales_daily_delta_order()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO sales_daily_delta (day, status, payment_status, order_count, revenue, item_count)
+                SELECT n.created_at::DATE, n.status, n.payment_status,
+                       COUNT(*), SUM(n.total), COALESCE(SUM(d.items), 0)
+                FROM new_orders n
+                LEFT JOIN LATERAL (
+                    SELECT SUM(quantity) AS items FROM orderdetail WHERE order_id = n.id
+                ) d ON TRUE
+                GROUP BY 1, 2, 3;
+
+            ELSIF TG_OP = 'UPDATE' THEN
+                WITH changed AS (
+                    SELECT o.created_at::DATE AS old_day, o.status AS old_status,
+                           o.payment_status AS old_payment_status, o.total AS old_total,
+                           n.created_at::DATE AS new_day, n.status AS new_status,
+                           n.payment_status AS new_payment_status, n.total AS new_total,
+                           COALESCE(d.items, 0) AS items
+                    FROM old_orders o
+                    JOIN new_orders n ON n.id = o.id
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(quantity) AS items FROM orderdetail WHERE order_id = n.id
+                    ) d ON TRUE
+                    WHERE o.created_at::DATE <> n.created_at::DATE
+                       OR o.status <> n.status
+                       OR o.payment_status <> n.payment_status
+                       OR o.total <> n.total
+                )
+                INSERT INTO sales_daily_delta (day, status, payment_status, order_count, revenue, item_count)
+                SELECT day, status, payment_status, SUM(orders), SUM(revenue), SUM(items)
+                FROM (
+                    SELECT old_day, old_status, old_payment_status, -1, -old_total, -items FROM changed
+                    UNION ALL
+                    SELECT new_day, new_status, new_payment_status, 1, new_total, items FROM changed
+                ) moved (day, status, payment_status, orders, revenue, items)
+                GROUP BY day, status, payment_status
+                HAVING SUM(orders) <> 0 OR SUM(revenue) <> 0 OR SUM(items) <> 0;
+
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO sales_daily_delta (day, status, payment_status, order_count, revenue, item_count)
+                SELECT o.created_at::DATE, o.status, o.payment_status,
+                       -COUNT(*), -SUM(o.total), -COALESCE(SUM(d.items), 0)
+                FROM old_orders o
+                LEFT JOIN LATERAL (
+                    SELECT SUM(quantity) AS items FROM orderdetail WHERE order_id = o.id
+                ) d ON TRUE
+                GROUP BY 1, 2, 3;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_sales_daily_order_insert
+        AFTER INSERT ON "order"
+        REFERENCING NEW TABLE AS new_orders
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_sales_daily_delta_order();
+
+        CREATE TRIGGER trg_sales_daily_order_update
+        AFTER UPDATE ON "order"
+        REFERENCING OLD TABLE AS old_orders NEW TABLE AS new_orders
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_sales_daily_delta_order();
+
+        CREATE TRIGGER trg_sales_daily_order_delete
+        AFTER DELETE ON "order"
+        REFERENCING OLD TABLE AS old_orders
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_sales_daily_delta_order();
+    """)
+
+    # =================================================================
+    # TRIGGER: fn_sales_daily_delta_detail (por sentencia)
+    # =================================================================
+
+    # Igual que en 0011, los detalles solo mueven item_count del bucket
+    # actual de su orden.  Postgres no admite tablas de transición con
+    # lista de columnas, así que el UPDATE se dispara con cualquier
+    # cambio y las filas sin cambio de orden ni cantidad se anulan solas.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sales_daily_delta_detail()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO sales_daily_delta (day, status, payment_status, order_count, revenue, item_count)
+                SELECT o.created_at::DATE, o.status, o.payment_status, 0, 0, SUM(n.quantity)
+                FROM new_details n
+                JOIN "order" o ON o.id = n.order_id
+                GROUP BY 1, 2, 3;
+
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO sales_daily_delta (day, status, payment_status, order_count, revenue, item_count)
+                SELECT o.created_at::DATE, o.status, o.payment_status, 0, 0, SUM(moved.quantity)
+                FROM (
+                    SELECT order_id, -quantity FROM old_details
+                    UNION ALL
+                    SELECT order_id, quantity FROM new_details
+                ) moved (order_id, quantity)
+                JOIN "order" o ON o.id = moved.order_id
+                GROUP BY 1, 2, 3
+                HAVING SUM(moved.quantity) <> 0;
+
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO sales_daily_delta (day, status, payment_status, order_count, revenue, item_count)
+                SELECT o.created_at::DATE, o.status, o.payment_status, 0, 0, -SUM(od.quantity)
+                FROM old_details od
+                JOIN "order" o ON o.id = od.order_id
+                GROUP BY 1, 2, 3;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_sales_daily_detail_insert
+        AFTER INSERT ON orderdetail
+        REFERENCING NEW TABLE AS new_details
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_sales_daily_delta_detail();
+
+        CREATE TRIGGER trg_sales_daily_detail_update
+        AFTER UPDATE ON orderdetail
+        REFERENCING OLD TABLE AS old_details NEW TABLE AS new_details
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_sales_daily_delta_detail();
+
+        CREATE TRIGGER trg_sales_daily_detail_delete
+        AFTER DELETE ON orderdetail
+        REFERENCING OLD TABLE AS old_details
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION fn_sales_daily_delta_detail();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_sales_daily_order_insert ON "order";
+        DROP TRIGGER IF EXISTS trg_sales_daily_order_update ON "order";
+        DROP TRIGGER IF EXISTS trg_sales_daily_order_delete ON "order";
+        DROP TRIGGER IF EXISTS trg_sales_daily_detail_insert ON orderdetail;
+        DROP TRIGGER IF EXISTS trg_sales_daily_detail_update ON orderdetail;
+        DROP TRIGGER IF EXISTS trg_sales_daily_detail_delete ON orderdetail;
+        DROP FUNCTION IF EXISTS fn_sales_daily_delta_order();
+        DROP FUNCTION IF EXISTS fn_sales_daily_delta_detail();
+    """)
+
+    # Los deltas pendientes se pasan a sales_daily antes de borrar la tabla
+    op.execute("""
+        INSERT INTO sales_daily AS s (day, status, payment_status, order_count, revenue, item_count)
+        SELECT day, status, payment_status, SUM(order_count), SUM(revenue), SUM(item_count)
+        FROM sales_daily_delta
+        GROUP BY day, status, payment_status
+        ORDER BY day, status, payment_status
+        ON CONFLICT (day, status, payment_status) DO UPDATE
+        SET order_count = s.order_count + EXCLUDED.order_count,
+            revenue = s.revenue + EXCLUDED.revenue,
+            item_count = s.item_count + EXCLUDED.item_count
+    """)
+    op.drop_table("sales_daily_delta")
+
+    # Funciones y triggers por fila de la migración 0011
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sales_daily_add(
+            p_day DATE,
+            p_status orderstatus,
+            p_payment_status paymentstatus,
+            p_orders BIGINT,
+            p_revenue NUMERIC,
+            p_items BIGINT
+        )
+        RETURNS VOID AS $$
+        BEGIN
+            INSERT INTO sales_daily AS s (day, status, payment_status, order_count, revenue, item_count)
+            VALUES (p_day, p_status, p_payment_status, p_orders, p_revenue, p_items)
+            ON CONFLICT (day, status, payment_status) DO UPDATE
+            SET order_count = s.order_count + EXCLUDED.order_count,
+                revenue = s.revenue + EXCLUDED.revenue,
+                item_count = s.item_count + EXCLUDED.item_count;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION fn_sales_daily_order()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_items BIGINT;
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND OLD.created_at::DATE = NEW.created_at::DATE
+               AND OLD.status = NEW.status
+               AND OLD.payment_status = NEW.payment_status
+               AND OLD.total = NEW.total THEN
+                RETURN NULL;
+            END IF;
+
+            SELECT COALESCE(SUM(quantity), 0) INTO v_items
+            FROM orderdetail
+            WHERE order_id = COALESCE(NEW.id, OLD.id);
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM fn_sales_daily_add(
+                    OLD.created_at::DATE, OLD.status, OLD.payment_status, -1, -OLD.total, -v_items
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM fn_sales_daily_add(
+                    NEW.created_at::DATE, NEW.status, NEW.payment_status, 1, NEW.total, v_items
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_sales_daily_order
+        AFTER INSERT OR UPDATE OR DELETE ON "order"
+        FOR EACH ROW
+        EXECUTE FUNCTION fn_sales_daily_order();
+
+        CREATE OR REPLACE FUNCTION fn_sales_daily_detail()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_order RECORD;
+            v_delta BIGINT;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                v_delta := NEW.quantity;
+            ELSIF TG_OP = 'DELETE' THEN
+                v_delta := -OLD.quantity;
+            ELSIF OLD.order_id = NEW.order_id THEN
+                v_delta := NEW.quantity - OLD.quantity;
+            ELSE
+                SELECT created_at, status, payment_status INTO v_order FROM "order" WHERE id = OLD.order_id;
+                IF FOUND THEN
+                    PERFORM fn_sales_daily_add(
+                        v_order.created_at::DATE, v_order.status, v_order.payment_status, 0, 0, -OLD.quantity
+                    );
+                END IF;
+                v_delta := NEW.quantity;
+            END IF;
+
+            IF v_delta = 0 THEN
+                RETURN NULL;
+            END IF;
+
+            SELECT created_at, status, payment_status INTO v_order
+            FROM "order"
+            WHERE id = COALESCE(NEW.order_id, OLD.order_id);
+            IF FOUND THEN
+                PERFORM fn_sales_daily_add(
+                    v_order.created_at::DATE, v_order.status, v_order.payment_status, 0, 0, v_delta
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trg_sales_daily_detail
+        AFTER INSERT OR UPDATE OF order_id, quantity OR DELETE ON orderdetail
+        FOR EACH ROW
+        EXECUTE FUNCTION fn_sales_daily_detail();
+    """)
@@ -0,0 +1,183 @@
+import gzip
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+import brotli
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import BaseModel
+from sqlmodel import Session, select
+
+from app.api.routes.categories import CategoryPublic
+from app.api.routes.products import ProductPublic
+from app.core.catalog_cache import CatalogSnapshot, catalog_cache
+from app.core.db import get_db
+from app.core.http_cache import CATALOG_CACHE_CONTROL, etag_matches, select_encoding
+from app.models import CatalogChange, Category, Product, ProductVariant
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+
+# Body del catálogo completo que usa la tienda en la carga inicial
+class CatalogBundle(BaseModel):
+    # Cursor para pedir después solo los cambios con /catalog/changes
+    cursor: int
+    categories: list[CategoryPublic]
+    products: list[ProductPublic]
+
+
+# Body de la petición de cambios incrementales del catálogo
+class CategoryChange(BaseModel):
+    id: int
+    name: str
+    description: str | None
+    updated_at: datetime
+
+
+class ProductChange(BaseModel):
+    id: int
+    category_id: int
+    name: str
+    description: str | None
+    is_active: bool
+    updated_at: datetime
+
+
+class VariantChange(BaseModel):
+    id: int
+    product_id: int
+    name: str
+    price: Decimal
+    image_path: str | None
+    updated_at: datetime
+
+
+class DeletedIds(BaseModel):
+    categories: list[int] = []
+    products: list[int] = []
+    variants: list[int] = []
+
+
+class CatalogChanges(BaseModel):
+    cursor: int
+    has_more: bool
+    categories: list[CategoryChange] = []
+    products: list[ProductChange] = []
+    variants: list[VariantChange] = []
+    deleted: DeletedIds
+
+
+@dataclass(frozen=True)
+class EncodedBundle:
+    etag: str
+    bodies: dict[str, bytes]
+
+
+# Orden de preferencia del servidor para la compresión
+ENCODINGS = ["br", "gzip"]
+
+
+def _build_bundle(snapshot: CatalogSnapshot) -> EncodedBundle:
+    # Se serializa y comprime una sola vez por versión del catálogo
+    bundle = CatalogBundle.model_validate(
+        {
+            "cursor": snapshot.cursor,
+            "categories": snapshot.categories,
+            "products": [p for p in snapshot.products if p.is_active],
+        },
+        from_attributes=True,
+    )
+    raw = bundle.model_dump_json().encode("utf-8")
+    return EncodedBundle(
+        etag=snapshot.etag("bundle"),
+        bodies={
+            "identity": raw,
+            "gzip": gzip.compress(raw, compresslevel=9, mtime=0),
+            "br": brotli.compress(raw, quality=11),
+        },
+    )
+
+
+@router.get("", response_model=None, responses={200: {"model": CatalogBundle}})
+def get_catalog(request: Request, db: Session = Depends(get_db)):
+    # Devuelve categorías, productos activos y sus variantes en un solo documento
+    # ya codificado; solo se reconstruye cuando el catálogo cambia
+    bundle: EncodedBundle = catalog_cache.view(
+        catalog_cache.snapshot(db), ("bundle",), _build_bundle
+    )
+    encoding = select_encoding(request.headers.get("accept-encoding"), ENCODINGS)
+
+    # Cada codificación es una representación distinta, así que lleva su propio ETag
+    etag = bundle.etag if encoding == "identity" else f'{bundle.etag[:-1]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CATALOG_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=bundle.bodies[encoding],
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@router.get("/changes", response_model=CatalogChanges)
+def list_catalog_changes(
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    # Devuelve solo lo que cambió después del cursor: filas creadas o
+    # actualizadas con su estado actual e ids borrados como tombstones
+    changes = db.exec(
+        select(CatalogChange)
+        .where(CatalogChange.id > since)
+        .order_by(CatalogChange.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # Solo importa la última acción de cada fila dentro de la página
+    latest: dict[str, dict[int, str]] = {
+        "category": {},
+        "product": {},
+        "productvariant": {},
+    }
+    for change in changes:
+        latest[change.entity][change.entity_id] = change.action
+
+    def _load(model, entity: str) -> tuple[list, list[int]]:
+        actions = latest[entity]
+        live_ids = [i for i, action in actions.items() if action != "DELETE"]
+        rows = (
+            db.exec(select(model).where(model.id.in_(live_ids)).order_by(model.id)).all()
+            if live_ids
+            else []
+        )
+        # Una fila que ya no existe se borró después; su DELETE llegará
+        # en una página siguiente, pero se puede reportar desde ya
+        found = {r.id for r in rows}
+        deleted = sorted(i for i in actions if i not in found)
+        return rows, deleted
+
+    categories, deleted_categories = _load(Category, "category")
+    products, deleted_products = _load(Product, "product")
+    variants, deleted_variants = _load(ProductVariant, "productvariant")
+
+    return CatalogChanges(
+        cursor=changes[-1].id if changes else since,
+        has_more=has_more,
+        categories=[CategoryChange.model_validate(c, from_attributes=True) for c in categories],
+        products=[ProductChange.model_validate(p, from_attributes=True) for p in products],
+        variants=[VariantChange.model_validate(v, from_attributes=True) for v in variants],
+        deleted=DeletedIds(
+            categories=deleted_categories,
+            products=deleted_products,
+            variants=deleted_variants,
+        ),
+    )
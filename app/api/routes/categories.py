@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel, field_validator
 from sqlmodel import Session, select
 
+from app.core.catalog_cache import catalog_cache
 from app.core.db import get_db
 from app.core.deps import get_current_user, require_admin
+from app.core.http_cache import conditional_get
 from app.models import Category, Product, User
 
 router = APIRouter(prefix="/categories", tags=["categories"])
@@ -38,16 +40,26 @@ class CategoryPublic(BaseModel):
     description: str | None
 
 @router.get("/", response_model=list[CategoryPublic])
-def list_categories(db: Session = Depends(get_db)):
-    categories = db.exec(select(Category)).all()
-    return categories
+def list_categories(request: Request, response: Response, db: Session = Depends(get_db)):
+    # Las categorías se sirven desde la caché del catálogo
+    snapshot = catalog_cache.snapshot(db)
+    not_modified = conditional_get(request, response, snapshot.etag("categories"))
+    if not_modified:
+        return not_modified
+    return catalog_cache.view(snapshot, ("categories",), lambda snap: snap.categories)
 
 
 @router.get("/{category_id}", response_model=CategoryPublic)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    category = db.get(Category, category_id)
+def get_category(
+    category_id: int, request: Request, response: Response, db: Session = Depends(get_db)
+):
+    snapshot = catalog_cache.snapshot(db)
+    category = snapshot.categories_by_id.get(category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    not_modified = conditional_get(request, response, snapshot.etag("category", category_id))
+    if not_modified:
+        return not_modified
     return category
 
 
@@ -58,6 +70,7 @@ def create_category(data: CategoryCreate, db: Session = Depends(get_db), _user:
     category = Category(**data.model_dump())
     db.add(category)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(category)
     return category
 
@@ -76,6 +89,7 @@ def update_category(
     category.sqlmodel_update(update_data)
     db.add(category)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(category)
     return category
 
@@ -99,3 +113,4 @@ def delete_category(category_id: int, db: Session = Depends(get_db), _user: User
 
     db.delete(category)
     db.commit()
+    catalog_cache.invalidate()
@@ -1,15 +1,21 @@
 import uuid
+from decimal import Decimal
 
-import bcrypt
 import jwt
+import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr, field_validator
 from pydantic_extra_types.phone_numbers import PhoneNumber
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import Session, select
 
+from app.api.routes.orders import OrderCreate, OrderPublic, _invalidate_client_orders
 from app.core.db import get_db
-from app.core.deps import get_current_client
-from app.core.email import send_password_reset_email, send_verification_email
+from app.core.deps import get_current_client, invalidate_client
+from app.core.email import enqueue_email, password_reset_email, verification_email
+from app.core.passwords import hash_password, needs_rehash, verify_password
 from app.core.security import (
     create_access_token,
     create_email_verification_token,
@@ -19,7 +25,15 @@ from app.core.security import (
     decode_password_reset_token,
     decode_refresh_token,
 )
-from app.models import Client, ClientCartItem
+from app.models import (
+    Client,
+    ClientCartItem,
+    Order,
+    OrderDetail,
+    PaymentMethod,
+    Product,
+    ProductVariant,
+)
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
@@ -90,9 +104,7 @@ def register(client: RegisterClient, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Hash password
-    password_bytes = client.password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    password_hash = bcrypt.hashpw(password_bytes, salt).decode("utf-8")
+    password_hash = hash_password(client.password)
 
     new_client = Client(
         email=client.email,
@@ -102,22 +114,14 @@ def register(client: RegisterClient, db: Session = Depends(get_db)):
         is_verified=False,
     )
     db.add(new_client)
-    db.commit()
-    db.refresh(new_client)
 
-    # Send verification email
+    # Queue verification email (se envía en segundo plano, en la misma transacción)
     token = create_email_verification_token(new_client.id)
-    email_sent = send_verification_email(str(new_client.email), new_client.name, token)
-
-    message = (
-        "Registro exitoso. Revisa tu correo para verificar tu cuenta."
-        if email_sent
-        else "Registro exitoso, pero no pudimos enviar el correo de verificación. "
-             "Usa la opción de reenviar verificación."
-    )
+    enqueue_email(db, verification_email(str(new_client.email), new_client.name, token))
+    db.commit()
 
     return {
-        "message": message,
+        "message": "Registro exitoso. Revisa tu correo para verificar tu cuenta.",
         "client_id": str(new_client.id),
     }
 
@@ -132,10 +136,16 @@ def login(data: LoginClient, db: Session = Depends(get_db)):
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
     # Check password
-    password_bytes = data.password.encode("utf-8")
-    if not bcrypt.checkpw(password_bytes, client.password_hash.encode("utf-8")):
+    if not verify_password(data.password, client.password_hash):
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
+    # Si cambió el costo de bcrypt, se actualiza el hash con la contraseña ya validada
+    if needs_rehash(client.password_hash):
+        client.password_hash = hash_password(data.password)
+        db.add(client)
+        db.commit()
+        invalidate_client(client.id)
+
     # Check email verification
     if not client.is_verified:
         raise HTTPException(
@@ -184,6 +194,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     client.is_verified = True
     db.add(client)
     db.commit()
+    invalidate_client(client.id)
 
     return {"message": "Correo verificado exitosamente. Ya puedes iniciar sesión."}
 
@@ -199,7 +210,8 @@ def resend_verification(data: ResendVerificationRequest, db: Session = Depends(g
         return {"message": "Si el correo está registrado y no verificado, recibirás un enlace."}
 
     token = create_email_verification_token(client.id)
-    send_verification_email(str(client.email), client.name, token)
+    enqueue_email(db, verification_email(str(client.email), client.name, token))
+    db.commit()
 
     return {"message": "Correo de verificación enviado. Revisa tu bandeja de entrada."}
 
@@ -214,7 +226,8 @@ def forgot_password(data: ForgotPasswordRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="No existe una cuenta registrada con este correo")
 
     token = create_password_reset_token(client.id)
-    send_password_reset_email(str(client.email), client.name, token)
+    enqueue_email(db, password_reset_email(str(client.email), client.name, token))
+    db.commit()
 
     return {"message": "Si el correo está registrado, recibirás un enlace para restablecer tu contraseña."}
 
@@ -237,12 +250,11 @@ def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Cliente no encontrado.")
 
     # Hash new password
-    password_bytes = data.new_password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    client.password_hash = bcrypt.hashpw(password_bytes, salt).decode("utf-8")
+    client.password_hash = hash_password(data.new_password)
 
     db.add(client)
     db.commit()
+    invalidate_client(client.id)
 
     return {"message": "Contraseña restablecida exitosamente."}
 
@@ -296,11 +308,37 @@ class CartItemData(BaseModel):
     product_badge: str | None = None
     quantity: int
 
+    @field_validator("quantity")
+    @classmethod
+    def quantity_must_be_positive(cls, v: int) -> int:
+        if v <= 0:
+            raise ValueError("Quantity must be greater than 0")
+        return v
+
 
 class CartSyncRequest(BaseModel):
     items: list[CartItemData]
 
 
+class CartCheckoutRequest(BaseModel):
+    payment_method: PaymentMethod
+    delivery_address: str | None = None
+    notes: str | None = None
+
+
+# Item del carrito cuyo precio guardado ya no coincide con el de la variante
+class CartPriceCorrection(BaseModel):
+    product_id: str
+    product_name: str
+    cart_price: Decimal
+    price: Decimal
+
+
+class CartCheckoutResponse(BaseModel):
+    order: OrderPublic
+    price_corrections: list[CartPriceCorrection]
+
+
 # ---------- Cart endpoints ----------
 
 
@@ -329,31 +367,64 @@ def get_cart(
     }
 
 
+# Columnas que el cliente puede cambiar en cada item del carrito
+CART_ITEM_FIELDS = (
+    "product_name",
+    "product_price",
+    "product_image",
+    "product_badge",
+    "quantity",
+)
+
+
+def _merge_cart_items(items: list[CartItemData]) -> dict[str, CartItemData]:
+    # Un producto repetido en el carrito se junta en un solo item
+    # (suma las cantidades y se queda con los datos del último)
+    merged: dict[str, CartItemData] = {}
+    for item in items:
+        previous = merged.get(item.product_id)
+        if previous is not None:
+            item = item.model_copy(update={"quantity": previous.quantity + item.quantity})
+        merged[item.product_id] = item
+    return merged
+
+
 @router.put("/cart")
 def sync_cart(
     data: CartSyncRequest,
     client: Client = Depends(get_current_client),
     db: Session = Depends(get_db),
 ):
-    # Borra los items del carrito guardados en el servidor para el cliente autenticado y los reemplaza por los enviados en la petición.
-    existing = db.exec(
-        select(ClientCartItem).where(ClientCartItem.client_id == client.id)
-    ).all()
-    for item in existing:
-        db.delete(item)
-
-    # Agrega los nuevos items del carrito
-    for item_data in data.items:
-        cart_item = ClientCartItem(
-            client_id=client.id,
-            product_id=item_data.product_id,
-            product_name=item_data.product_name,
-            product_price=item_data.product_price,
-            product_image=item_data.product_image,
-            product_badge=item_data.product_badge,
-            quantity=item_data.quantity,
+    # Reemplaza el carrito guardado por el enviado con dos sentencias: un
+    # upsert de todos los items y un DELETE de los que ya no están
+    items = _merge_cart_items(data.items)
+
+    if items:
+        upsert = insert(ClientCartItem).values(
+            [
+                {
+                    "client_id": client.id,
+                    "product_id": product_id,
+                    **item.model_dump(include=set(CART_ITEM_FIELDS)),
+                }
+                for product_id, item in items.items()
+            ]
+        )
+        current = sa.tuple_(*(getattr(ClientCartItem, f) for f in CART_ITEM_FIELDS))
+        incoming = sa.tuple_(*(upsert.excluded[f] for f in CART_ITEM_FIELDS))
+        db.exec(
+            upsert.on_conflict_do_update(
+                index_elements=["client_id", "product_id"],
+                set_={f: upsert.excluded[f] for f in CART_ITEM_FIELDS},
+                # Los items sin cambios no se reescriben
+                where=current.is_distinct_from(incoming),
+            )
         )
-        db.add(cart_item)
+
+    stale = delete(ClientCartItem).where(ClientCartItem.client_id == client.id)
+    if items:
+        stale = stale.where(ClientCartItem.product_id.not_in(list(items)))
+    db.exec(stale)
 
     db.commit()
     return {"message": "Carrito actualizado."}
@@ -365,10 +436,127 @@ def clear_server_cart(
     db: Session = Depends(get_db),
 ):
     # Borra los items del carrito guardados en el servidor para el cliente autenticado.
-    existing = db.exec(
-        select(ClientCartItem).where(ClientCartItem.client_id == client.id)
-    ).all()
-    for item in existing:
-        db.delete(item)
+    db.exec(delete(ClientCartItem).where(ClientCartItem.client_id == client.id))
     db.commit()
     return {"message": "Carrito vaciado."}
+
+
+@router.post(
+    "/cart/checkout",
+    response_model=CartCheckoutResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def checkout_cart(
+    data: CartCheckoutRequest,
+    client: Client = Depends(get_current_client),
+    db: Session = Depends(get_db),
+):
+    # Convierte el carrito guardado en una órden dentro de una sola transacción.
+    # El product_id de cada item del carrito es el id de la ProductVariant;
+    # los precios se toman siempre de la variante y no del carrito.
+    order_data = OrderCreate(
+        client_id=client.id,
+        client_name=client.name,
+        phone=str(client.phone),
+        details=[],
+        **data.model_dump(),
+    )
+
+    # El DELETE ... RETURNING lee y vacía el carrito a la vez: un checkout
+    # simultáneo del mismo cliente espera a este y encuentra el carrito vacío.
+    # Si algo falla abajo, el rollback deja el carrito como estaba.
+    items = db.scalars(
+        delete(ClientCartItem)
+        .where(ClientCartItem.client_id == client.id)
+        .returning(ClientCartItem)
+    ).all()
+    if not items:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+
+    variant_ids: dict[str, int] = {}
+    for item in items:
+        try:
+            variant_ids[item.product_id] = int(item.product_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cart item {item.product_id} is not a product variant",
+            )
+
+    # Una sola consulta para todas las variantes del carrito y sus productos
+    variants = {
+        variant.id: (variant, product)
+        for variant, product in db.exec(
+            select(ProductVariant, Product)
+            .join(Product, Product.id == ProductVariant.product_id)
+            .where(ProductVariant.id.in_(set(variant_ids.values())))
+        ).all()
+    }
+
+    order_total = Decimal("0")
+    detail_rows: list[dict] = []
+    corrections: list[CartPriceCorrection] = []
+    for item in items:
+        found = variants.get(variant_ids[item.product_id])
+        if found is None:
+            raise HTTPException(
+                status_code=404, detail=f"Product variant {item.product_id} not found"
+            )
+        variant, product = found
+        # Carritos guardados antes de validar la cantidad pueden traer 0 o negativos
+        if item.quantity <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Quantity of cart item {item.product_id} must be greater than 0",
+            )
+        if not product.is_active:
+            raise HTTPException(
+                status_code=400, detail=f"Product {product.id} is not active"
+            )
+
+        # El precio del carrito es un float guardado cuando se agregó el item
+        cart_price = Decimal(str(item.product_price)).quantize(Decimal("0.01"))
+        if cart_price != variant.price:
+            corrections.append(
+                CartPriceCorrection(
+                    product_id=item.product_id,
+                    product_name=item.product_name,
+                    cart_price=cart_price,
+                    price=variant.price,
+                )
+            )
+
+        subtotal = variant.price * item.quantity
+        order_total += subtotal
+        detail_rows.append(
+            {
+                "product_id": product.id,
+                "variant_name": variant.name,
+                "quantity": item.quantity,
+                "unit_price": variant.price,
+                "subtotal": subtotal,
+            }
+        )
+
+    # El ticket lo asigna la base de datos y se lee con RETURNING en el flush
+    order = Order(
+        **order_data.model_dump(exclude={"details", "delivery_address"}),
+        delivery_address=order_data.delivery_address or "Recoger en tienda",
+        total=order_total,
+    )
+    db.add(order)
+    db.flush()
+
+    # Todos los detalles en un solo INSERT ... RETURNING
+    for row in detail_rows:
+        row["order_id"] = order.id
+    details = db.scalars(sa.insert(OrderDetail).returning(OrderDetail), detail_rows).all()
+    set_committed_value(order, "details", list(details))
+
+    response = CartCheckoutResponse(
+        order=OrderPublic.model_validate(order, from_attributes=True),
+        price_corrections=corrections,
+    )
+    db.commit()
+    _invalidate_client_orders(client.id)
+    return response
@@ -1,18 +1,31 @@
+import asyncio
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from typing import Optional
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from pydantic import BaseModel, field_validator
-from sqlmodel import Session, select
-
-from app.core.db import get_db
-from app.core.deps import get_current_client, get_current_user
+from pydantic import BaseModel, Field, field_validator, model_validator
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, func, select
+
+from app.core import idempotency
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.db import engine, get_db
+from app.core.deps import get_current_client, get_current_user, get_idempotency_scope
+from app.core.order_events import order_events
+from app.core.order_export import EXPORT_MEDIA_TYPES, stream_export
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from app.models import (
     Client,
     Order,
+    OrderAudit,
     OrderDetail,
     OrderStatus,
     PaymentMethod,
@@ -25,6 +38,27 @@ from app.models import (
 router = APIRouter(prefix="/orders", tags=["orders"])
 bearer_scheme = HTTPBearer(auto_error=False)
 
+# Páginas de /my-orders por (client_id, cursor, limit); se invalidan cuando
+# se crea o modifica una órden del cliente y expiran solas después del TTL
+_my_orders_cache = LRUCache(maxsize=1024, ttl=settings.MY_ORDERS_CACHE_TTL_SECONDS)
+
+
+def _invalidate_client_orders(client_id: uuid.UUID | None) -> None:
+    if client_id is not None:
+        _my_orders_cache.evict(lambda key: key[0] == client_id)
+
+
+# Tablero de producción: se recalcula como máximo cada pocos segundos
+# y se descarta en cuanto cambia el estado de alguna órden
+_production_board_cache = LRUCache(maxsize=1, ttl=settings.PRODUCTION_BOARD_CACHE_TTL_SECONDS)
+
+# Estados en los que la órden todavía tiene producto por hornear
+PRODUCTION_STATUSES = [OrderStatus.CONFIRMED, OrderStatus.PREPARING]
+
+
+def _invalidate_production_board() -> None:
+    _production_board_cache.clear()
+
 # Estos dos schemas son necesarios para la relación de Orders con OrderDetails
 class OrderDetailCreate(BaseModel):
     product_id: int
@@ -107,8 +141,37 @@ class OrderUpdate(BaseModel):
     payment_status: PaymentStatus | None = None
     notes: str | None = None
 
+# Body de la petición para cambiar el estado de varias órdenes a la vez
+class OrderBulkUpdate(BaseModel):
+    order_ids: list[int] = Field(min_length=1, max_length=500)
+    status: OrderStatus | None = None
+    payment_status: PaymentStatus | None = None
+
+    @field_validator("status", "payment_status", mode="before")
+    @classmethod
+    def not_null(cls, v):
+        # Omitir el campo está bien; mandarlo en null escribiría NULL en la órden
+        if v is None:
+            raise ValueError("must not be null; omit the field instead")
+        return v
+
+    @model_validator(mode="after")
+    def target_required(self) -> "OrderBulkUpdate":
+        if self.status is None and self.payment_status is None:
+            raise ValueError("status or payment_status is required")
+        return self
+
+
+# Resultado por órden de PATCH /orders/bulk
+class OrderBulkResult(BaseModel):
+    order_id: int
+    updated: bool
+    status: OrderStatus | None = None
+    payment_status: PaymentStatus | None = None
+    error: str | None = None
+
 # Body de la peticion para listar y obtener las órdenes
-class OrderPublic(BaseModel):
+class OrderSummary(BaseModel):
     id: int
     ticket_number: str
     client_id: uuid.UUID | None
@@ -121,46 +184,301 @@ class OrderPublic(BaseModel):
     notes: str | None
     total: Decimal
     created_at: datetime
+
+
+class OrderPublic(OrderSummary):
     details: list[OrderDetailPublic] = []
 
-# Genera el número de ticket basado en el último ID de órden en la base de datos
-def _generate_ticket(db: Session) -> str:
-    last = db.exec(select(Order).order_by(Order.id.desc())).first()
-    next_num = (last.id + 1) if last else 1
-    return f"TK-{next_num:04d}"
+
+# Evento del stream de órdenes (una fila de order_audit)
+class OrderEvent(BaseModel):
+    id: int
+    order_id: int
+    action: str
+    old_status: str | None = None
+    new_status: str | None = None
+    old_payment_status: str | None = None
+    new_payment_status: str | None = None
+    old_total: Decimal | None = None
+    new_total: Decimal | None = None
+    changed_at: datetime
+
+    @field_validator("changed_at")
+    @classmethod
+    def changed_at_utc(cls, v: datetime) -> datetime:
+        # NOTIFY manda la fecha sin zona horaria; se guarda en UTC
+        return v if v.tzinfo else v.replace(tzinfo=timezone.utc)
 
 @router.get("/my-orders", response_model=list[OrderPublic])
 def list_my_orders(
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
     client: Client = Depends(get_current_client),
     db: Session = Depends(get_db),
 ):
     """Lista las órdenes del cliente autenticado."""
-    query = (
-        select(Order)
-        .where(Order.client_id == client.id)
-        .order_by(Order.id.desc())
-    )
-    orders = db.exec(query).all()
+    cache_key = (client.id, cursor, limit)
+    cached = _my_orders_cache.get(cache_key)
+    if cached is None:
+        # Paginación keyset sobre (client_id, id) con los detalles de la
+        # página cargados en una sola consulta
+        query = (
+            select(Order)
+            .where(Order.client_id == client.id)
+            .options(selectinload(Order.details))
+            .order_by(Order.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            (last_id,) = decode_cursor(cursor, int)
+            query = query.where(Order.id < last_id)
+        orders = db.exec(query).all()
+
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = encode_cursor(orders[-1].id)
+        cached = (
+            tuple(OrderPublic.model_validate(o, from_attributes=True) for o in orders),
+            next_cursor,
+        )
+        _my_orders_cache.set(cache_key, cached)
+
+    orders, next_cursor = cached
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return orders
 
 
-@router.get("/", response_model=list[OrderPublic])
+class ProductionBoardItem(BaseModel):
+    product_id: int
+    product_name: str
+    variant_name: str
+    quantity: int
+    orders: int
+
+
+@router.get("/production-board", response_model=list[ProductionBoardItem])
+def get_production_board(
+    db: Session = Depends(get_db),
+    _user: User = Depends(get_current_user),
+):
+    """Cantidades pendientes de hornear por producto y variante."""
+    board = _production_board_cache.get("board")
+    if board is None:
+        # Un solo GROUP BY sobre los detalles de las órdenes en producción
+        quantity = func.sum(OrderDetail.quantity)
+        rows = db.exec(
+            select(
+                OrderDetail.product_id,
+                Product.name,
+                OrderDetail.variant_name,
+                quantity,
+                func.count(func.distinct(OrderDetail.order_id)),
+            )
+            .join(Order, Order.id == OrderDetail.order_id)
+            .join(Product, Product.id == OrderDetail.product_id)
+            .where(Order.status.in_(PRODUCTION_STATUSES))
+            .group_by(OrderDetail.product_id, Product.name, OrderDetail.variant_name)
+            .order_by(quantity.desc(), OrderDetail.product_id, OrderDetail.variant_name)
+        ).all()
+        board = tuple(
+            ProductionBoardItem(
+                product_id=product_id,
+                product_name=product_name,
+                variant_name=variant_name,
+                quantity=total,
+                orders=orders,
+            )
+            for product_id, product_name, variant_name, total, orders in rows
+        )
+        _production_board_cache.set("board", board)
+    return board
+
+
+# Cada cuánto se manda un comentario para mantener viva la conexión SSE
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_BACKLOG_BATCH = 500
+# Los ids de order_audit salen de una secuencia y no siguen el orden de
+# commit: una transacción que tomó un id menor puede confirmarse después.
+# Al reanudar se reenvían también los eventos con id menor al Last-Event-ID
+# de este margen previo (más que la transacción de órdenes más larga);
+# el cliente descarta los ids que ya tiene.
+STREAM_RESUME_OVERLAP_SECONDS = 60
+
+
+def _sse(event: OrderEvent) -> str:
+    return f"id: {event.id}\nevent: order\ndata: {event.model_dump_json()}\n\n"
+
+
+def _load_backlog(after_id: int) -> list[OrderEvent]:
+    # Eventos que el cliente se perdió mientras estaba desconectado.
+    # Sesión propia y corta: la de la petición ya se cerró y el stream
+    # puede durar horas sin retener una conexión del pool.
+    with Session(engine) as db:
+        rows = db.exec(
+            select(OrderAudit)
+            .where(OrderAudit.id > after_id)
+            .order_by(OrderAudit.id)
+            .limit(STREAM_BACKLOG_BATCH)
+        ).all()
+        return [OrderEvent.model_validate(r, from_attributes=True) for r in rows]
+
+
+def _load_overlap(after_id: int) -> list[OrderEvent]:
+    # Eventos con id menor al Last-Event-ID que pudieron confirmarse tarde
+    with Session(engine) as db:
+        anchor = db.exec(
+            select(func.max(OrderAudit.changed_at)).where(OrderAudit.id == after_id)
+        ).one()
+        if anchor is None:
+            return []
+        rows = db.exec(
+            select(OrderAudit)
+            .where(
+                OrderAudit.changed_at >= anchor - timedelta(seconds=STREAM_RESUME_OVERLAP_SECONDS),
+                OrderAudit.id < after_id,
+            )
+            .order_by(OrderAudit.id)
+        ).all()
+        return [OrderEvent.model_validate(r, from_attributes=True) for r in rows]
+
+
+@router.get("/stream")
+async def stream_orders(
+    request: Request,
+    last_event_id: int | None = Header(default=None, alias="Last-Event-ID"),
+    since: int | None = Query(default=None, ge=0),
+    db: Session = Depends(get_db),
+    _user: User = Depends(get_current_user),
+):
+    """Stream (Server-Sent Events) de altas y cambios de estado o pago de las órdenes.
+
+    Al reanudar con Last-Event-ID pueden repetirse eventos ya recibidos
+    (ver STREAM_RESUME_OVERLAP_SECONDS); el cliente los descarta por id.
+    """
+    # get_current_user ya usó la sesión de la petición; se cierra para no
+    # retener una conexión del pool durante todo el stream y no se reutiliza
+    db.close()
+    after_id = last_event_id if last_event_id is not None else since
+
+    async def events():
+        # Se suscribe antes de leer el historial para no perder nada entre ambos
+        subscription = order_events.subscribe()
+        try:
+            # Ids ya enviados desde el historial; los mismos eventos pueden
+            # llegar otra vez por NOTIFY y no se repiten
+            sent_ids: set[int] = set()
+            if after_id is not None:
+                for event in await run_in_threadpool(_load_overlap, after_id):
+                    sent_ids.add(event.id)
+                    yield _sse(event)
+                cursor = after_id
+                while True:
+                    backlog = await run_in_threadpool(_load_backlog, cursor)
+                    for event in backlog:
+                        sent_ids.add(event.id)
+                        yield _sse(event)
+                    if backlog:
+                        cursor = backlog[-1].id
+                    if len(backlog) < STREAM_BACKLOG_BATCH:
+                        break
+
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                # El cliente se reconecta con Last-Event-ID y recupera lo perdido
+                if subscription.overflowed:
+                    break
+                event = OrderEvent.model_validate(payload)
+                if event.id in sent_ids:
+                    sent_ids.discard(event.id)
+                    continue
+                yield _sse(event)
+        finally:
+            order_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/", response_model=list[OrderPublic] | list[OrderSummary])
 def list_orders(
+    response: Response,
     status: OrderStatus | None = None,
     payment_status: PaymentStatus | None = None,
+    include_details: bool = True,
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=200),
     db: Session = Depends(get_db),
     _user: User = Depends(get_current_user),
 ):
-    # Busqueda y ordenamiento por id
-    query = select(Order).order_by(Order.id.desc())
+    # Paginación keyset sobre (created_at, id): cada página empieza después
+    # de la última fila de la anterior, sin OFFSET
+    query = (
+        select(Order)
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit + 1)
+    )
     # Si el estado de la órden fue proporcionado solo se traen las órdenes con ese estado
     if status is not None:
         query = query.where(Order.status == status)
     # Si el estado del pago fue proporcionado solo se traen las órdenes con ese estado de pago
     if payment_status is not None:
         query = query.where(Order.payment_status == payment_status)
+    if cursor is not None:
+        created_at, order_id = decode_cursor(cursor, datetime, int)
+        query = query.where(
+            sa.tuple_(Order.created_at, Order.id) < (created_at, order_id)
+        )
+    # Los detalles de toda la página se cargan en una sola consulta
+    if include_details:
+        query = query.options(selectinload(Order.details))
+
     orders = db.exec(query).all()
-    return orders
+    if len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+
+    schema = OrderPublic if include_details else OrderSummary
+    return [schema.model_validate(o, from_attributes=True) for o in orders]
+
+
+@router.get("/export")
+def export_orders(
+    export_format: Literal["csv", "ndjson", "parquet"] = Query(default="csv", alias="format"),
+    date_from: datetime | None = Query(default=None, alias="from"),
+    date_to: datetime | None = Query(default=None, alias="to"),
+    _user: User = Depends(get_current_user),
+):
+    """Exporta las órdenes con sus detalles, una fila por línea de orden."""
+    # Las fechas sin zona horaria se interpretan como UTC
+    if date_from is not None and date_from.tzinfo is None:
+        date_from = date_from.replace(tzinfo=timezone.utc)
+    if date_to is not None and date_to.tzinfo is None:
+        date_to = date_to.replace(tzinfo=timezone.utc)
+
+    def chunks():
+        # Sesión propia que vive lo mismo que la respuesta; el cursor del
+        # lado del servidor entrega las filas por bloques
+        with Session(engine) as db:
+            yield from stream_export(db, export_format, date_from, date_to)
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{export_format}"'},
+    )
 
 
 @router.get("/{order_id}", response_model=OrderPublic)
@@ -172,8 +490,65 @@ def get_order(order_id: int, db: Session = Depends(get_db), _user: User = Depend
     return order
 
 
+@router.get("/{order_id}/audit", response_model=list[OrderEvent])
+def get_order_audit(
+    order_id: int,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    _user: User = Depends(get_current_user),
+):
+    """Historial de cambios de una orden, del más reciente al más viejo."""
+    # Paginación keyset sobre (changed_at, id) con el índice
+    # (order_id, changed_at, id) de cada partición
+    query = (
+        select(OrderAudit)
+        .where(OrderAudit.order_id == order_id)
+        .order_by(OrderAudit.changed_at.desc(), OrderAudit.id.desc())
+        .limit(limit + 1)
+    )
+    # order_audit está particionada por mes: los límites explícitos sobre
+    # changed_at dejan que Postgres descarte las particiones fuera del rango.
+    # Ningún cambio es anterior a la creación de la orden (con margen por
+    # diferencias de reloj); si la orden ya se borró solo se usa el cursor.
+    order = db.get(Order, order_id)
+    if order is not None:
+        query = query.where(OrderAudit.changed_at >= order.created_at - timedelta(days=1))
+    if cursor is not None:
+        changed_at, audit_id = decode_cursor(cursor, datetime, int)
+        query = query.where(
+            OrderAudit.changed_at <= changed_at,
+            sa.tuple_(OrderAudit.changed_at, OrderAudit.id) < (changed_at, audit_id),
+        )
+
+    events = db.exec(query).all()
+    if not events and order is None and cursor is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.changed_at, last.id)
+    return [OrderEvent.model_validate(e, from_attributes=True) for e in events]
+
+
 @router.post("/", response_model=OrderPublic, status_code=201)
-def create_order(data: OrderCreate, db: Session = Depends(get_db)):
+def create_order(
+    data: OrderCreate,
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(
+        default=None, alias=idempotency.IDEMPOTENCY_KEY_HEADER, max_length=255
+    ),
+    idempotency_scope: str = Depends(get_idempotency_scope),
+):
+    # Si la petición es un reintento con la misma llave se devuelve la
+    # respuesta original sin volver a validar ni insertar nada
+    if idempotency_key is not None:
+        request_hash = idempotency.fingerprint(data)
+        replayed = idempotency.replay(db, idempotency_scope, idempotency_key, request_hash)
+        if replayed is not None:
+            return replayed
+
     # Debe de tener al menos un detalle
     if not data.details:
         raise HTTPException(
@@ -190,9 +565,14 @@ def create_order(data: OrderCreate, db: Session = Depends(get_db)):
             )
 
     # Verifica que todos los productos existan y estén activos
+    # (una sola consulta para todos los productos de la órden)
     product_ids = {d.product_id for d in data.details}
+    products = {
+        p.id: p
+        for p in db.exec(select(Product).where(Product.id.in_(product_ids))).all()
+    }
     for pid in product_ids:
-        product = db.get(Product, pid)
+        product = products.get(pid)
         if not product:
             raise HTTPException(
                 status_code=404, detail=f"Product {pid} not found"
@@ -203,13 +583,18 @@ def create_order(data: OrderCreate, db: Session = Depends(get_db)):
             )
 
     # Verifica que cada variante exista para su producto y que el unit_price coincida
-    for d in data.details:
-        variant = db.exec(
+    # (una sola consulta para todos los pares (product_id, variant_name))
+    pairs = {(d.product_id, d.variant_name) for d in data.details}
+    variants = {
+        (v.product_id, v.name): v
+        for v in db.exec(
             select(ProductVariant).where(
-                ProductVariant.product_id == d.product_id,
-                ProductVariant.name == d.variant_name,
+                sa.tuple_(ProductVariant.product_id, ProductVariant.name).in_(pairs)
             )
-        ).first()
+        ).all()
+    }
+    for d in data.details:
+        variant = variants.get((d.product_id, d.variant_name))
         if not variant:
             raise HTTPException(
                 status_code=404,
@@ -224,9 +609,6 @@ def create_order(data: OrderCreate, db: Session = Depends(get_db)):
                 ),
             )
 
-    # Genera numero de ticket
-    ticket = _generate_ticket(db)
-
     # Calcula subtotales y total en Python (sin stored procedure)
     order_total = Decimal("0")
     detail_objects: list[OrderDetail] = []
@@ -244,8 +626,9 @@ def create_order(data: OrderCreate, db: Session = Depends(get_db)):
             )
         )
 
+    # El número de ticket lo genera la base de datos con una secuencia,
+    # así dos órdenes simultáneas nunca reciben el mismo
     order = Order(
-        ticket_number=ticket,
         client_id=data.client_id,
         client_name=data.client_name,
         phone=data.phone,
@@ -262,7 +645,25 @@ def create_order(data: OrderCreate, db: Session = Depends(get_db)):
         detail.order_id = order.id
         db.add(detail)
 
+    if idempotency_key is not None:
+        db.flush()
+        response = OrderPublic.model_validate(order, from_attributes=True)
+        idempotency.remember(db, idempotency_scope, idempotency_key, request_hash, 201, response)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Otra petición con la misma llave se confirmó primero: se
+            # descarta esta órden y se devuelve la respuesta de aquella
+            db.rollback()
+            replayed = idempotency.replay(db, idempotency_scope, idempotency_key, request_hash)
+            if replayed is None:
+                raise
+            return replayed
+        _invalidate_client_orders(data.client_id)
+        return response
+
     db.commit()
+    _invalidate_client_orders(data.client_id)
     db.refresh(order)
     return order
 
@@ -278,6 +679,107 @@ VALID_STATUS_TRANSITIONS: dict[OrderStatus, list[OrderStatus]] = {
 }
 
 
+def _transition_error(
+    current: OrderStatus, payment_status: PaymentStatus, target: OrderStatus
+) -> str | None:
+    allowed = VALID_STATUS_TRANSITIONS.get(current, [])
+    if target not in allowed:
+        return (
+            f"Cannot transition from '{current}' to '{target}'. "
+            f"Allowed transitions: {[s.value for s in allowed] if allowed else 'none'}"
+        )
+    # No se puede cancelar una órden que ya fue pagada
+    if target == OrderStatus.CANCELLED and payment_status == PaymentStatus.PAID:
+        return "No se puede cancelar una orden que ya fue pagada"
+    return None
+
+
+@router.patch("/bulk", response_model=list[OrderBulkResult])
+def bulk_update_orders(
+    data: OrderBulkUpdate, db: Session = Depends(get_db),
+    _user: User = Depends(get_current_user),
+):
+    """Cambia el estado o el estado de pago de varias órdenes con un solo UPDATE."""
+    order_ids = list(dict.fromkeys(data.order_ids))
+    values = data.model_dump(exclude_none=True, exclude={"order_ids"})
+
+    # Las reglas de update_order se evalúan en el WHERE: solo se actualizan
+    # las órdenes cuyo estado actual permite la transición pedida
+    conditions = [Order.id.in_(order_ids)]
+    if data.status is not None:
+        sources = [
+            current
+            for current, allowed in VALID_STATUS_TRANSITIONS.items()
+            if data.status in allowed
+        ]
+        conditions.append(Order.status.in_(sources))
+        if data.status == OrderStatus.CANCELLED:
+            conditions.append(Order.payment_status != PaymentStatus.PAID)
+
+    updated = {
+        row.id: row
+        for row in db.exec(
+            sa.update(Order)
+            .where(*conditions)
+            .values(**values)
+            .returning(Order.id, Order.client_id, Order.status, Order.payment_status)
+            .execution_options(synchronize_session=False)
+        ).all()
+    }
+    db.commit()
+
+    # Solo para las rechazadas se lee el estado actual y se explica el motivo
+    rejected_ids = [order_id for order_id in order_ids if order_id not in updated]
+    rejected = {}
+    if rejected_ids:
+        rejected = {
+            row.id: row
+            for row in db.exec(
+                select(Order.id, Order.status, Order.payment_status).where(
+                    Order.id.in_(rejected_ids)
+                )
+            ).all()
+        }
+
+    for client_id in {row.client_id for row in updated.values()}:
+        _invalidate_client_orders(client_id)
+    if updated:
+        _invalidate_production_board()
+
+    results = []
+    for order_id in order_ids:
+        if order_id in updated:
+            row = updated[order_id]
+            results.append(
+                OrderBulkResult(
+                    order_id=order_id,
+                    updated=True,
+                    status=row.status,
+                    payment_status=row.payment_status,
+                )
+            )
+            continue
+        row = rejected.get(order_id)
+        if row is None:
+            error = "Order not found"
+        elif data.status is not None:
+            error = _transition_error(row.status, row.payment_status, data.status) or (
+                "Order changed while updating; retry"
+            )
+        else:
+            error = "Order changed while updating; retry"
+        results.append(
+            OrderBulkResult(
+                order_id=order_id,
+                updated=False,
+                status=row.status if row else None,
+                payment_status=row.payment_status if row else None,
+                error=error,
+            )
+        )
+    return results
+
+
 @router.patch("/{order_id}", response_model=OrderPublic)
 def update_order(
     order_id: int, data: OrderUpdate, db: Session = Depends(get_db),
@@ -290,27 +792,17 @@ def update_order(
 
     # Valida que la transición de estado sea coherente
     if data.status is not None:
-        allowed = VALID_STATUS_TRANSITIONS.get(order.status, [])
-        if data.status not in allowed:
-            raise HTTPException(
-                status_code=400,
-                detail=(
-                    f"Cannot transition from '{order.status}' to '{data.status}'. "
-                    f"Allowed transitions: {[s.value for s in allowed] if allowed else 'none'}"
-                ),
-            )
-        # No se puede cancelar una órden que ya fue pagada
-        if data.status == OrderStatus.CANCELLED and order.payment_status == PaymentStatus.PAID:
-            raise HTTPException(
-                status_code=400,
-                detail="No se puede cancelar una orden que ya fue pagada",
-            )
+        error = _transition_error(order.status, order.payment_status, data.status)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
 
     update_data = data.model_dump(exclude_unset=True)
     order.sqlmodel_update(update_data)
     db.add(order)
     db.commit()
     db.refresh(order)
+    _invalidate_client_orders(order.client_id)
+    _invalidate_production_board()
     return order
 
 
@@ -320,5 +812,8 @@ def delete_order(order_id: int, db: Session = Depends(get_db), _user: User = Dep
     order = db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    client_id = order.client_id
     db.delete(order)
     db.commit()
+    _invalidate_client_orders(client_id)
+    _invalidate_production_board()
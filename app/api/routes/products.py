@@ -1,12 +1,27 @@
+from datetime import datetime, timedelta
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, field_validator
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func, select
 
+from app.core.best_sellers import BEST_SELLERS_VIEW
+from app.core.catalog_cache import CatalogSnapshot, catalog_cache
 from app.core.db import get_db
 from app.core.deps import get_current_user, require_admin
-from app.models import Category, Product, ProductVariant, OrderDetail, User
+from app.core.http_cache import conditional_get
+from app.models import (
+    BestSeller,
+    Category,
+    MaterializedViewRefresh,
+    Product,
+    ProductRelated,
+    ProductVariant,
+    OrderDetail,
+    User,
+    get_datetime_utc,
+)
 
 router = APIRouter(prefix="/products", tags=["products"])
 
@@ -99,62 +114,190 @@ class ProductPublic(BaseModel):
     is_active: bool
     variants: list[VariantPublic] = []
 
+class RelatedProduct(ProductPublic):
+    score: float
+
+
+class BestSellerItem(BaseModel):
+    product_id: int
+    product_name: str
+    variant_name: str
+    quantity: int
+
+
+class BestSellers(BaseModel):
+    # Momento del último refresco de la vista (qué tan frescos son los datos)
+    refreshed_at: datetime | None
+    items: list[BestSellerItem]
+
+
+def _commit_variants(db: Session) -> None:
+    # El índice único (product_id, name) rechaza variantes con nombre repetido
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Variant name already exists for this product",
+        )
+
+
+def _filter_products(
+    snapshot: CatalogSnapshot, category_id: int | None, active_only: bool
+):
+    return tuple(
+        p
+        for p in snapshot.products
+        if (category_id is None or p.category_id == category_id)
+        and (not active_only or p.is_active)
+    )
+
+
+def _check_category(snapshot: CatalogSnapshot, category_id: int | None) -> None:
+    # Verifica que la categoría exista
+    if category_id is not None and category_id not in snapshot.categories_by_id:
+        raise HTTPException(status_code=404, detail="Category not found")
+
+
 @router.get("/", response_model=list[ProductPublic])
 def list_products(
+    request: Request,
+    response: Response,
     category_id: int | None = None,
     active_only: bool = True,
     db: Session = Depends(get_db),
 ):
-    query = select(Product)
-    if category_id is not None:
-        # Verifica que la categoría exista
-        category = db.get(Category, category_id)
-        if not category:
-            raise HTTPException(status_code=404, detail="Category not found")
-        query = query.where(Product.category_id == category_id)
-    # Devuelve solo productos activos
-    if active_only:
-        query = query.where(Product.is_active == True)
-    products = db.exec(query).all()
-    return products
+    # Los productos se sirven desde la caché del catálogo
+    snapshot = catalog_cache.snapshot(db)
+    _check_category(snapshot, category_id)
+    not_modified = conditional_get(
+        request, response, snapshot.etag("products", category_id, active_only)
+    )
+    if not_modified:
+        return not_modified
+    return catalog_cache.view(
+        snapshot,
+        ("products", category_id, active_only),
+        lambda snap: _filter_products(snap, category_id, active_only),
+    )
 
 
 @router.get("/products_with_variants", response_model=list[VariantPublic])
 def list_products_with_variants(
+    request: Request,
+    response: Response,
     category_id: int | None = None,
     active_only: bool = True,
     db: Session = Depends(get_db),
 ):
-    query = select(ProductVariant).join(Product)
+    snapshot = catalog_cache.snapshot(db)
+    _check_category(snapshot, category_id)
+    not_modified = conditional_get(
+        request, response, snapshot.etag("variants", category_id, active_only)
+    )
+    if not_modified:
+        return not_modified
+    return catalog_cache.view(
+        snapshot,
+        ("variants", category_id, active_only),
+        lambda snap: tuple(
+            v
+            for p in _filter_products(snap, category_id, active_only)
+            for v in p.variants
+        ),
+    )
+
+@router.get("/best-sellers", response_model=BestSellers)
+def best_sellers(
+    days: int = Query(default=30, ge=1, le=365),
+    category_id: int | None = None,
+    limit: int = Query(default=10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    # Lee la vista materializada mv_best_sellers; nunca agrega orderdetail en línea
+    since = get_datetime_utc().date() - timedelta(days=days - 1)
+    quantity = func.sum(BestSeller.quantity)
+    query = (
+        select(BestSeller.product_id, Product.name, BestSeller.variant_name, quantity)
+        .join(Product, Product.id == BestSeller.product_id)
+        .where(BestSeller.day >= since, Product.is_active == True)
+        .group_by(BestSeller.product_id, Product.name, BestSeller.variant_name)
+        .order_by(quantity.desc(), BestSeller.product_id, BestSeller.variant_name)
+        .limit(limit)
+    )
     if category_id is not None:
-        # Verifica que la categoría exista
-        category = db.get(Category, category_id)
-        if not category:
-            raise HTTPException(status_code=404, detail="Category not found")
-        query = query.where(Product.category_id == category_id)
-    # Devuelve solo productos activos
-    if active_only:
-        query = query.where(Product.is_active == True)
-    variants = db.exec(query).all()
-    return variants
+        query = query.where(BestSeller.category_id == category_id)
+
+    refresh = db.get(MaterializedViewRefresh, BEST_SELLERS_VIEW)
+    return BestSellers(
+        refreshed_at=refresh.refreshed_at if refresh else None,
+        items=[
+            BestSellerItem(
+                product_id=product_id,
+                product_name=name,
+                variant_name=variant_name,
+                quantity=total,
+            )
+            for product_id, name, variant_name, total in db.exec(query).all()
+        ],
+    )
+
 
 @router.get("/{product_id}", response_model=ProductPublic)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(
+    product_id: int, request: Request, response: Response, db: Session = Depends(get_db)
+):
     # Verifica que el producto exista
-    product = db.get(Product, product_id)
+    snapshot = catalog_cache.snapshot(db)
+    product = snapshot.products_by_id.get(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    not_modified = conditional_get(request, response, snapshot.etag("product", product_id))
+    if not_modified:
+        return not_modified
     return product
 
 @router.get("/{product_id}/variants", response_model=list[VariantPublic])
-def list_variants(product_id: int, db: Session = Depends(get_db)):
+def list_variants(
+    product_id: int, request: Request, response: Response, db: Session = Depends(get_db)
+):
     # Verifica que el producto exista
-    product = db.get(Product, product_id)
+    snapshot = catalog_cache.snapshot(db)
+    product = snapshot.products_by_id.get(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    not_modified = conditional_get(request, response, snapshot.etag("product", product_id))
+    if not_modified:
+        return not_modified
     return product.variants
 
 
+@router.get("/{product_id}/related", response_model=list[RelatedProduct])
+def list_related_products(
+    product_id: int,
+    limit: int = Query(default=10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    snapshot = catalog_cache.snapshot(db)
+    if product_id not in snapshot.products_by_id:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    # Una sola lectura por la llave primaria (product_id, rank); los datos
+    # de cada producto salen del snapshot del catálogo
+    related = db.exec(
+        select(ProductRelated.related_product_id, ProductRelated.score)
+        .where(ProductRelated.product_id == product_id, ProductRelated.rank <= limit)
+        .order_by(ProductRelated.rank)
+    ).all()
+    return [
+        dict(vars(product), score=score)
+        for related_id, score in related
+        if (product := snapshot.products_by_id.get(related_id)) is not None
+        and product.is_active
+    ]
+
+
 @router.post("/", response_model=ProductPublic, status_code=201)
 def create_product(data: ProductCreate, db: Session = Depends(get_db), _user: User = Depends(get_current_user)):
     # Verifica que la categoria exista
@@ -176,7 +319,8 @@ def create_product(data: ProductCreate, db: Session = Depends(get_db), _user: Us
         variant = ProductVariant(product_id=product.id, name=v.name, price=v.price)
         db.add(variant)
 
-    db.commit()
+    _commit_variants(db)
+    catalog_cache.invalidate()
     db.refresh(product)
     return product
 
@@ -200,6 +344,7 @@ def update_product(
     product.sqlmodel_update(update_data)
     db.add(product)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(product)
     return product
 
@@ -223,6 +368,7 @@ def delete_product(product_id: int, db: Session = Depends(get_db), _user: User =
 
     db.delete(product)
     db.commit()
+    catalog_cache.invalidate()
 
 @router.post(
     "/{product_id}/variants", response_model=VariantPublic, status_code=201
@@ -237,7 +383,8 @@ def create_variant(
 
     variant = ProductVariant(product_id=product_id, **data.model_dump())
     db.add(variant)
-    db.commit()
+    _commit_variants(db)
+    catalog_cache.invalidate()
     db.refresh(variant)
     return variant
 
@@ -265,7 +412,8 @@ def update_variant(
     update_data = data.model_dump(exclude_unset=True)
     variant.sqlmodel_update(update_data)
     db.add(variant)
-    db.commit()
+    _commit_variants(db)
+    catalog_cache.invalidate()
     db.refresh(variant)
     return variant
 
@@ -285,3 +433,4 @@ def delete_variant(
         raise HTTPException(status_code=404, detail="Variant not found")
     db.delete(variant)
     db.commit()
+    catalog_cache.invalidate()
@@ -0,0 +1,182 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Literal
+
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlmodel import Session, func, select
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.db import get_db
+from app.core.deps import get_current_user
+from app.core.sales_daily import current_rollup
+from app.models import Order, OrderDetail, OrderStatus, PaymentStatus, Product, User
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+# Resúmenes por rango de fechas
+_sales_summary_cache = LRUCache(maxsize=256, ttl=settings.SALES_SUMMARY_CACHE_TTL_SECONDS)
+
+# Órdenes que todavía no se entregan ni se cancelan
+OPEN_STATUSES = [
+    OrderStatus.PENDING,
+    OrderStatus.CONFIRMED,
+    OrderStatus.PREPARING,
+    OrderStatus.DELIVERING,
+]
+
+
+class SalesSummary(BaseModel):
+    total_orders: int
+    total_revenue: Decimal
+    average_ticket: Decimal
+    delivered_orders: int
+    cancelled_orders: int
+    pending_orders: int
+    top_product: str
+    top_product_quantity: int
+
+
+class SalesPoint(BaseModel):
+    period: date
+    order_count: int
+    revenue: Decimal
+    item_count: int
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Las fechas sin zona horaria se interpretan como UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _date_range(date_from: datetime, date_to: datetime) -> tuple[datetime, datetime]:
+    date_from, date_to = _as_utc(date_from), _as_utc(date_to)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    return date_from, date_to
+
+
+def _sales_summary_query(date_from: datetime, date_to: datetime):
+    # Mismos resultados que sp_resumen_ventas en una sola sentencia: las
+    # órdenes del rango se leen una vez (CTE) y todos los conteos salen
+    # de agregados condicionales (FILTER) sobre esa única lectura
+    orders = (
+        select(Order.id, Order.status, Order.payment_status, Order.total)
+        .where(Order.created_at.between(date_from, date_to))
+        .cte("orders_in_range")
+    )
+    not_cancelled = orders.c.status != OrderStatus.CANCELLED
+
+    totals = (
+        select(
+            func.count().label("total_orders"),
+            func.coalesce(
+                func.sum(orders.c.total).filter(
+                    orders.c.status == OrderStatus.DELIVERED,
+                    orders.c.payment_status == PaymentStatus.PAID,
+                ),
+                0,
+            ).label("total_revenue"),
+            func.coalesce(
+                func.round(func.avg(orders.c.total).filter(not_cancelled), 2), 0
+            ).label("average_ticket"),
+            func.count().filter(orders.c.status == OrderStatus.DELIVERED).label("delivered_orders"),
+            func.count().filter(orders.c.status == OrderStatus.CANCELLED).label("cancelled_orders"),
+            func.count().filter(orders.c.status.in_(OPEN_STATUSES)).label("pending_orders"),
+        )
+        .select_from(orders)
+        .subquery("totals")
+    )
+
+    quantity = func.sum(OrderDetail.quantity)
+    top = (
+        select(Product.name.label("top_product"), quantity.label("top_product_quantity"))
+        .select_from(OrderDetail)
+        .join(orders, orders.c.id == OrderDetail.order_id)
+        .join(Product, Product.id == OrderDetail.product_id)
+        .where(not_cancelled)
+        .group_by(Product.id, Product.name)
+        .order_by(quantity.desc())
+        .limit(1)
+        .subquery("top")
+    )
+
+    return select(totals, top.c.top_product, top.c.top_product_quantity).select_from(
+        totals.outerjoin(top, sa.true())
+    )
+
+
+@router.get("/sales-summary", response_model=SalesSummary)
+def sales_summary(
+    date_from: datetime = Query(alias="from"),
+    date_to: datetime = Query(alias="to"),
+    db: Session = Depends(get_db),
+    _user: User = Depends(get_current_user),
+):
+    date_from, date_to = _date_range(date_from, date_to)
+    cache_key = (date_from, date_to)
+    summary = _sales_summary_cache.get(cache_key)
+    if summary is None:
+        row = db.exec(_sales_summary_query(date_from, date_to)).one()
+        summary = SalesSummary(
+            total_orders=row.total_orders,
+            total_revenue=row.total_revenue,
+            average_ticket=row.average_ticket,
+            delivered_orders=row.delivered_orders,
+            cancelled_orders=row.cancelled_orders,
+            pending_orders=row.pending_orders,
+            # Igual que el procedimiento: 'N/A' cuando no hubo ventas
+            top_product=row.top_product or "N/A",
+            top_product_quantity=row.top_product_quantity or 0,
+        )
+        _sales_summary_cache.set(cache_key, summary)
+    return summary
+
+
+@router.get("/sales-timeseries", response_model=list[SalesPoint])
+def sales_timeseries(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    granularity: Literal["day", "week", "month"] = "day",
+    status: OrderStatus | None = None,
+    payment_status: PaymentStatus | None = None,
+    db: Session = Depends(get_db),
+    _user: User = Depends(get_current_user),
+):
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+
+    # Solo lee el rollup sales_daily y sus deltas pendientes (a lo más unas
+    # filas por día), nunca las órdenes
+    rollup = current_rollup(date_from, date_to)
+    if granularity == "day":
+        period = rollup.c.day
+    else:
+        period = sa.cast(func.date_trunc(granularity, rollup.c.day), sa.Date)
+
+    query = (
+        select(
+            period.label("period"),
+            func.sum(rollup.c.order_count).label("order_count"),
+            func.sum(rollup.c.revenue).label("revenue"),
+            func.sum(rollup.c.item_count).label("item_count"),
+        )
+        .group_by(period)
+        .order_by(period)
+    )
+    if status is not None:
+        query = query.where(rollup.c.status == status)
+    if payment_status is not None:
+        query = query.where(rollup.c.payment_status == payment_status)
+
+    return [
+        SalesPoint(
+            period=row.period,
+            order_count=row.order_count,
+            revenue=row.revenue,
+            item_count=row.item_count,
+        )
+        for row in db.exec(query).all()
+    ]
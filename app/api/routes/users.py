@@ -1,12 +1,12 @@
 import uuid
 
-import bcrypt
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, field_validator
 from sqlmodel import Session, select
 
 from app.core.db import get_db
-from app.core.deps import get_current_user
+from app.core.deps import get_current_user, invalidate_user
+from app.core.passwords import hash_password, needs_rehash, verify_password
 from app.core.security import (
     create_admin_access_token,
     create_admin_refresh_token,
@@ -73,10 +73,16 @@ def login(data: LoginRequest, db: Session = Depends(get_db)):
     if not user.is_active:
         raise HTTPException(status_code=401, detail="Usuario desactivado")
 
-    password_bytes = data.password.encode("utf-8")
-    if not bcrypt.checkpw(password_bytes, user.password_hash.encode("utf-8")):
+    if not verify_password(data.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
+    # Si cambió el costo de bcrypt, se actualiza el hash con la contraseña ya validada
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(data.password)
+        db.add(user)
+        db.commit()
+        invalidate_user(user.id)
+
     access_token = create_admin_access_token(user.id)
     refresh_token = create_admin_refresh_token(user.id)
 
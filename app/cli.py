@@ -0,0 +1,212 @@
+import argparse
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+
+logger = logging.getLogger(__name__)
+
+# Tareas de mantenimiento para correr a mano o desde un cron:
+#   python -m app.cli <comando>
+
+
+def purge_idempotency_keys(args: argparse.Namespace) -> None:
+    from app.core.idempotency import purge_expired
+
+    with Session(engine) as db:
+        deleted = purge_expired(db, batch_size=args.batch_size)
+    logger.info("Llaves de idempotencia expiradas borradas: %s", deleted)
+
+
+def rebuild_sales_daily(args: argparse.Namespace) -> None:
+    from app.core.sales_daily import rebuild
+
+    with Session(engine) as db:
+        batches = rebuild(db, batch_days=args.batch_days)
+    logger.info("Rollup sales_daily reconstruido en %s lotes", batches)
+
+
+def fold_sales_daily(args: argparse.Namespace) -> None:
+    from app.core.sales_daily import fold
+
+    with Session(engine) as db:
+        buckets = fold(db)
+    logger.info("Buckets de sales_daily actualizados: %s", buckets)
+
+
+def refresh_best_sellers(args: argparse.Namespace) -> None:
+    from app.core.best_sellers import refresh
+
+    with Session(engine) as db:
+        refreshed_at = refresh(db)
+    logger.info("Vista de más vendidos refrescada a las %s", refreshed_at.isoformat())
+
+
+def compute_related_products(args: argparse.Namespace) -> None:
+    from app.core.related_products import rebuild
+
+    with Session(engine) as db:
+        rows = rebuild(db, top_k=args.top_k, chunk_size=args.chunk_size)
+    logger.info("Productos relacionados guardados: %s", rows)
+
+
+def maintain_order_audit(args: argparse.Namespace) -> None:
+    from app.core.order_audit import maintain_partitions
+
+    with Session(engine) as db:
+        created, dropped = maintain_partitions(
+            db, months_ahead=args.months_ahead, retention_months=args.retention_months
+        )
+    logger.info("Particiones de order_audit creadas: %s, borradas: %s", created, dropped)
+
+
+def export_orders(args: argparse.Namespace) -> None:
+    from app.core.order_export import write_export
+
+    with Session(engine) as db:
+        written = write_export(db, args.format, args.output, args.date_from, args.date_to)
+    logger.info("Exportación escrita en %s (%s bytes)", args.output, written)
+
+
+def send_emails(args: argparse.Namespace) -> None:
+    from app.core.email import send_pending
+
+    with Session(engine) as db:
+        sent = send_pending(db, batch_size=args.batch_size)
+    logger.info("Correos enviados: %s", sent)
+
+
+def bench_sales_summary(args: argparse.Namespace) -> None:
+    from app.core.benchmarks import sales_summary
+
+    with Session(engine) as db:
+        result = sales_summary(db, args.date_from, args.date_to, repeat=args.repeat)
+    for name in ("procedure", "query"):
+        logger.info(
+            "%s: mediana %.1f ms, p95 %.1f ms",
+            name, result[name]["median_ms"], result[name]["p95_ms"],
+        )
+    logger.info("Mismos resultados: %s", result["same_results"])
+    logger.info("Plan de la consulta:\n%s", "\n".join(result["plan"]))
+
+
+def bench_order_audit(args: argparse.Namespace) -> None:
+    from app.core.benchmarks import order_audit_bulk_update
+
+    with Session(engine) as db:
+        result = order_audit_bulk_update(db, rows=args.rows, repeat=args.repeat)
+    for name in ("statement_level", "row_level"):
+        logger.info(
+            "%s: mediana %.1f ms, p95 %.1f ms, %s filas de auditoría",
+            name, result[name]["median_ms"], result[name]["p95_ms"],
+            result["audit_rows"][name],
+        )
+
+
+def _utc_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="Tareas de mantenimiento del backend de Rouse",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    purge = commands.add_parser(
+        "purge-idempotency-keys",
+        help="Borra por lotes las llaves de idempotencia expiradas",
+    )
+    purge.add_argument("--batch-size", type=int, default=5000)
+    purge.set_defaults(func=purge_idempotency_keys)
+
+    sales_daily = commands.add_parser(
+        "rebuild-sales-daily",
+        help="Recalcula el rollup sales_daily desde el histórico de órdenes",
+    )
+    sales_daily.add_argument("--batch-days", type=int, default=31)
+    sales_daily.set_defaults(func=rebuild_sales_daily)
+
+    fold = commands.add_parser(
+        "fold-sales-daily",
+        help="Pasa los deltas pendientes de sales_daily_delta al rollup sales_daily",
+    )
+    fold.set_defaults(func=fold_sales_daily)
+
+    best = commands.add_parser(
+        "refresh-best-sellers",
+        help="Refresca la vista materializada de productos más vendidos",
+    )
+    best.set_defaults(func=refresh_best_sellers)
+
+    related = commands.add_parser(
+        "compute-related-products",
+        help="Calcula los productos comprados juntos a partir de las órdenes",
+    )
+    related.add_argument("--top-k", type=int, default=settings.RELATED_PRODUCTS_TOP_K)
+    related.add_argument("--chunk-size", type=int, default=100_000)
+    related.set_defaults(func=compute_related_products)
+
+    audit = commands.add_parser(
+        "maintain-order-audit",
+        help="Crea las particiones futuras de order_audit y borra las vencidas",
+    )
+    audit.add_argument(
+        "--months-ahead", type=int, default=settings.ORDER_AUDIT_PARTITIONS_AHEAD_MONTHS
+    )
+    audit.add_argument(
+        "--retention-months", type=int, default=settings.ORDER_AUDIT_RETENTION_MONTHS
+    )
+    audit.set_defaults(func=maintain_order_audit)
+
+    export = commands.add_parser(
+        "export-orders",
+        help="Exporta las órdenes con sus detalles a un archivo",
+    )
+    export.add_argument("--format", choices=["csv", "ndjson", "parquet"], default="csv")
+    export.add_argument("--from", dest="date_from", type=_utc_datetime, default=None)
+    export.add_argument("--to", dest="date_to", type=_utc_datetime, default=None)
+    export.add_argument("--output", type=Path, required=True)
+    export.set_defaults(func=export_orders)
+
+    emails = commands.add_parser(
+        "send-emails",
+        help="Envía los correos pendientes de la cola email_outbox",
+    )
+    emails.add_argument("--batch-size", type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+    emails.set_defaults(func=send_emails)
+
+    bench_summary = commands.add_parser(
+        "bench-sales-summary",
+        help="Compara sp_resumen_ventas con la consulta de GET /reports/sales-summary",
+    )
+    bench_summary.add_argument("--from", dest="date_from", type=_utc_datetime, required=True)
+    bench_summary.add_argument("--to", dest="date_to", type=_utc_datetime, required=True)
+    bench_summary.add_argument("--repeat", type=int, default=20)
+    bench_summary.set_defaults(func=bench_sales_summary)
+
+    bench_audit = commands.add_parser(
+        "bench-order-audit",
+        help="Mide un UPDATE masivo de órdenes con auditoría por sentencia y por fila",
+    )
+    bench_audit.add_argument("--rows", type=int, default=10_000)
+    bench_audit.add_argument("--repeat", type=int, default=5)
+    bench_audit.set_defaults(func=bench_order_audit)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s [%(name)s] %(message)s")
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import statistics
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+import sqlalchemy as sa
+from sqlmodel import Session
+
+# Mediciones contra una base Postgres real (idealmente una copia de
+# producción ya migrada); se corren con python -m app.cli bench-<nombre>.
+
+
+def _timed(run: Callable[[], Any], repeat: int) -> tuple[Any, dict[str, float]]:
+    result = None
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    timings = {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))],
+    }
+    return result, timings
+
+
+def sales_summary(
+    db: Session, date_from: datetime, date_to: datetime, repeat: int = 20
+) -> dict[str, Any]:
+    # sp_resumen_ventas (una lectura de "order" por cifra) contra la consulta
+    # de un solo paso de GET /reports/sales-summary, sin pasar por su caché
+    from app.api.routes.reports import _sales_summary_query
+
+    procedure = sa.text(
+        "CALL sp_resumen_ventas(:date_from, :date_to, "
+        "NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL)"
+    )
+    # El procedimiento recibe TIMESTAMP sin zona: se le pasa la hora UTC
+    params = {
+        "date_from": date_from.astimezone(timezone.utc).replace(tzinfo=None),
+        "date_to": date_to.astimezone(timezone.utc).replace(tzinfo=None),
+    }
+    query = _sales_summary_query(date_from, date_to)
+
+    old, old_timings = _timed(
+        lambda: tuple(db.connection().execute(procedure, params).one()), repeat
+    )
+    new, new_timings = _timed(lambda: tuple(db.exec(query).one()), repeat)
+
+    compiled = query.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS) {compiled}"
+    ).scalars().all()
+    db.rollback()
+
+    # Con empates en la cantidad el producto más vendido puede diferir
+    # de nombre; se comparan todas las cifras
+    same = old[:6] == new[:6] and (old[7] or 0) == (new[7] or 0)
+    return {
+        "procedure": old_timings,
+        "query": new_timings,
+        "same_results": same,
+        "plan": plan,
+    }
+
+
+# fn_audit_order por fila, como antes de la migración 0015 (solo la rama UPDATE)
+_ROW_LEVEL_AUDIT = """
+    DROP TRIGGER trg_audit_order_insert ON "order";
+    DROP TRIGGER trg_audit_order_update ON "order";
+    DROP TRIGGER trg_audit_order_delete ON "order";
+
+    CREATE FUNCTION fn_audit_order_row_bench()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        v_audit order_audit%ROWTYPE;
+    BEGIN
+        IF OLD.status IS DISTINCT FROM NEW.status
+           OR OLD.payment_status IS DISTINCT FROM NEW.payment_status
+           OR OLD.total IS DISTINCT FROM NEW.total THEN
+            INSERT INTO order_audit (
+                order_id, action,
+                old_status, new_status,
+                old_payment_status, new_payment_status,
+                old_total, new_total
+            )
+            VALUES (
+                NEW.id, 'UPDATE',
+                OLD.status, NEW.status,
+                OLD.payment_status, NEW.payment_status,
+                OLD.total, NEW.total
+            )
+            RETURNING * INTO v_audit;
+            PERFORM pg_notify('order_events', row_to_json(v_audit)::TEXT);
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER trg_audit_order
+    AFTER UPDATE ON "order"
+    FOR EACH ROW
+    EXECUTE FUNCTION fn_audit_order_row_bench();
+"""
+
+
+def order_audit_bulk_update(
+    db: Session, rows: int = 10_000, repeat: int = 5
+) -> dict[str, Any]:
+    # UPDATE de `rows` órdenes con los triggers de auditoría por sentencia
+    # (0015) y con el trigger por fila de antes.  Todo corre en una sola
+    # transacción que se deshace al final: las órdenes de prueba, los
+    # triggers cambiados y las filas de order_audit no quedan en la base.
+    # Mientras corre, la tabla "order" queda bloqueada para escrituras.
+    conn = db.connection()
+    ids = conn.execute(
+        sa.text("""
+            INSERT INTO "order" (
+                client_name, phone, delivery_address,
+                status, payment_method, payment_status, total, created_at
+            )
+            SELECT 'bench ' || g, '0000000000', 'bench',
+                   'pendiente', 'efectivo', 'pendiente', 10, timezone('utc', now())
+            FROM generate_series(1, :rows) g
+            RETURNING id
+        """),
+        {"rows": rows},
+    ).scalars().all()
+
+    update = sa.text("""UPDATE "order" SET status = 'confirmado' WHERE id = ANY(:ids)""")
+    audited = sa.text(
+        "SELECT COUNT(*) FROM order_audit WHERE action = 'UPDATE' AND order_id = ANY(:ids)"
+    )
+
+    def run() -> int:
+        # Cada corrida en su savepoint, para actualizar siempre las mismas filas
+        savepoint = conn.begin_nested()
+        try:
+            conn.execute(update, {"ids": ids})
+            return conn.execute(audited, {"ids": ids}).scalar_one()
+        finally:
+            savepoint.rollback()
+
+    try:
+        statement_rows, statement_timings = _timed(run, repeat)
+        conn.exec_driver_sql(_ROW_LEVEL_AUDIT)
+        row_rows, row_timings = _timed(run, repeat)
+    finally:
+        db.rollback()
+
+    return {
+        "rows": rows,
+        "statement_level": statement_timings,
+        "row_level": row_timings,
+        "audit_rows": {"statement_level": statement_rows, "row_level": row_rows},
+    }
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.models import BestSeller, MaterializedViewRefresh, get_datetime_utc
+
+BEST_SELLERS_VIEW = BestSeller.__tablename__
+
+
+def refresh(db: Session) -> datetime:
+    # CONCURRENTLY: las lecturas siguen viendo la versión anterior de la
+    # vista mientras se recalcula, en lugar de esperar al lock exclusivo
+    db.exec(sa.text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {BEST_SELLERS_VIEW}"))
+    refreshed_at = get_datetime_utc()
+    db.exec(
+        insert(MaterializedViewRefresh)
+        .values(view_name=BEST_SELLERS_VIEW, refreshed_at=refreshed_at)
+        .on_conflict_do_update(
+            index_elements=["view_name"], set_={"refreshed_at": refreshed_at}
+        )
+    )
+    db.commit()
+    return refreshed_at
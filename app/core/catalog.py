@@ -0,0 +1,31 @@
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from app.models import Product
+
+
+# Capa de consultas del catálogo.
+# Todas las consultas cargan las variantes junto con los productos
+# (selectinload: una consulta para productos y otra para todas sus variantes),
+# así el número de consultas no crece con el tamaño del catálogo.
+
+
+def select_products(category_id: int | None = None, active_only: bool = True):
+    # Consulta de productos con sus variantes cargadas de antemano
+    query = (
+        select(Product)
+        .options(selectinload(Product.variants))
+        .order_by(Product.id)
+    )
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+    if active_only:
+        query = query.where(Product.is_active == True)
+    return query
+
+
+def list_products(
+    db: Session, category_id: int | None = None, active_only: bool = True
+) -> list[Product]:
+    return list(db.exec(select_products(category_id, active_only)).all())
+
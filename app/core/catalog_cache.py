@@ -0,0 +1,183 @@
+import hashlib
+import threading
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from sqlmodel import Session, func, select
+
+from app.core import catalog
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models import CatalogChange, Category
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CategorySnapshot:
+    id: int
+    name: str
+    description: str | None
+
+
+@dataclass(frozen=True)
+class VariantSnapshot:
+    id: int
+    product_id: int
+    name: str
+    price: Decimal
+    image_path: str | None
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    id: int
+    category_id: int
+    name: str
+    description: str | None
+    is_active: bool
+    variants: tuple[VariantSnapshot, ...]
+
+
+@dataclass(frozen=True, eq=False)
+class CatalogSnapshot:
+    """Copia inmutable de todo el catálogo para una versión concreta."""
+
+    version: int
+    digest: str
+    cursor: int
+    categories: tuple[CategorySnapshot, ...]
+    products: tuple[ProductSnapshot, ...]
+    categories_by_id: Mapping[int, CategorySnapshot]
+    products_by_id: Mapping[int, ProductSnapshot]
+
+    def etag(self, *parts: Hashable) -> str:
+        # ETag fuerte: depende del contenido del catálogo y de la vista pedida,
+        # así que sobrevive reinicios y cambia con cualquier escritura real
+        raw = f"{self.digest}:{parts!r}".encode("utf-8")
+        return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+
+def load_snapshot(db: Session, version: int) -> CatalogSnapshot:
+    # Carga el catálogo completo en un número fijo de consultas.
+    # El cursor del registro de cambios se lee primero: los datos cargados
+    # después son al menos tan nuevos como él.
+    cursor = db.exec(select(func.max(CatalogChange.id))).one() or 0
+    categories = tuple(
+        CategorySnapshot(id=c.id, name=c.name, description=c.description)
+        for c in db.exec(select(Category).order_by(Category.id)).all()
+    )
+    products = tuple(
+        ProductSnapshot(
+            id=p.id,
+            category_id=p.category_id,
+            name=p.name,
+            description=p.description,
+            is_active=p.is_active,
+            variants=tuple(
+                VariantSnapshot(
+                    id=v.id,
+                    product_id=v.product_id,
+                    name=v.name,
+                    price=v.price,
+                    image_path=v.image_path,
+                )
+                for v in sorted(p.variants, key=lambda v: v.id)
+            ),
+        )
+        for p in catalog.list_products(db, active_only=False)
+    )
+    digest = hashlib.sha256(repr((categories, products)).encode("utf-8")).hexdigest()
+    return CatalogSnapshot(
+        version=version,
+        digest=digest,
+        cursor=cursor,
+        categories=categories,
+        products=products,
+        categories_by_id=MappingProxyType({c.id: c for c in categories}),
+        products_by_id=MappingProxyType({p.id: p for p in products}),
+    )
+
+
+class CatalogCache:
+    """Caché en proceso del catálogo, versionada e invalidada al escribir.
+
+    Cada escritura sobre categorías, productos o variantes llama a
+    ``invalidate()``, que incrementa la versión. La siguiente lectura
+    reconstruye el snapshot desde la base de datos; las vistas filtradas
+    (por categoría, solo activos, etc.) se derivan del snapshot en memoria
+    y se guardan en un LRU con la versión como parte de la llave.
+    """
+
+    def __init__(self, max_views: int):
+        self._version = 0
+        self._snapshot: CatalogSnapshot | None = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._views = LRUCache(maxsize=max_views)
+        self.rebuilds = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> int:
+        # Se llama después del commit de cualquier escritura al catálogo
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            version = self._version
+        self._views.clear()
+        return version
+
+    def snapshot(self, db: Session) -> CatalogSnapshot:
+        snap = self._snapshot
+        if snap is not None and snap.version == self._version:
+            return snap
+
+        # Solo un hilo reconstruye; los demás esperan y reutilizan el resultado
+        with self._rebuild_lock:
+            version = self._version
+            snap = self._snapshot
+            if snap is not None and snap.version == version:
+                return snap
+            snap = load_snapshot(db, version)
+            with self._lock:
+                # Si hubo una escritura mientras se cargaba, el snapshot
+                # queda con la versión vieja y se descarta en la siguiente lectura
+                if version == self._version:
+                    self._snapshot = snap
+                self.rebuilds += 1
+            return snap
+
+    def view(
+        self,
+        snap: CatalogSnapshot,
+        key: Hashable,
+        build: Callable[[CatalogSnapshot], Any],
+    ) -> Any:
+        # Devuelve una vista derivada del snapshot, calculándola una sola vez por versión
+        cache_key = (snap.version, key)
+        value = self._views.get(cache_key, _MISSING)
+        if value is _MISSING:
+            value = build(snap)
+            self._views.set(cache_key, value)
+        return value
+
+    def stats(self) -> dict:
+        views = self._views.stats()
+        return {
+            "version": self._version,
+            "hits": views["hits"],
+            "misses": views["misses"],
+            "rebuilds": self.rebuilds,
+            "views": views["size"],
+            "max_views": views["maxsize"],
+            "evictions": views["evictions"],
+        }
+
+
+catalog_cache = CatalogCache(max_views=settings.CATALOG_CACHE_MAX_VIEWS)
@@ -21,6 +21,17 @@ class Settings(BaseSettings):
     VERIFY_EMAIL: str
     RESET_PASSWORD_EMAIL: str
 
+    # Envío de correos: "resend", "file" (escribe JSON en EMAIL_FILE_DIR)
+    # o "memory" (pruebas). La cola email_outbox se revisa cada
+    # EMAIL_OUTBOX_POLL_SECONDS y un correo se descarta tras MAX_ATTEMPTS fallos.
+    # Mientras se envía un lote nadie más lo toma durante LEASE_SECONDS.
+    EMAIL_TRANSPORT: str = "resend"
+    EMAIL_FILE_DIR: str = "outbox"
+    EMAIL_OUTBOX_POLL_SECONDS: int = 5
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300
+
     # Frontend
     FRONTEND_HOST: str
 
@@ -30,5 +41,45 @@ class Settings(BaseSettings):
     EMAIL_TOKEN_EXPIRE_MINUTES: int = 60
     RESET_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Contraseñas: costo de bcrypt (log2 de las rondas), procesos dedicados
+    # a hashear y máximo de hashes en curso o en espera antes de responder 503.
+    # Al cambiar BCRYPT_ROUNDS los hashes se actualizan en el siguiente login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Caché de clientes/usuarios autenticados y de tokens ya verificados
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Caché del catálogo (número máximo de vistas filtradas en memoria)
+    CATALOG_CACHE_MAX_VIEWS: int = 128
+
+    # Caché de /orders/my-orders por cliente (segundos)
+    MY_ORDERS_CACHE_TTL_SECONDS: int = 30
+
+    # Caché del tablero de producción (segundos)
+    PRODUCTION_BOARD_CACHE_TTL_SECONDS: int = 5
+
+    # Caché de reportes de ventas por rango de fechas (segundos)
+    SALES_SUMMARY_CACHE_TTL_SECONDS: int = 60
+
+    # Vigencia de las llaves de idempotencia de POST /orders (horas)
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+
+    # Cada cuánto se pasan los deltas de sales_daily_delta a sales_daily (segundos)
+    SALES_DAILY_FOLD_SECONDS: int = 60
+
+    # Cada cuánto se refresca la vista materializada de más vendidos (segundos)
+    BEST_SELLERS_REFRESH_SECONDS: int = 600
+
+    # Vecinos guardados por producto en "comprados juntos"
+    RELATED_PRODUCTS_TOP_K: int = 10
+
+    # Particiones mensuales de order_audit: meses creados por adelantado
+    # y meses de historia que se conservan antes de borrar la partición
+    ORDER_AUDIT_PARTITIONS_AHEAD_MONTHS: int = 3
+    ORDER_AUDIT_RETENTION_MONTHS: int = 24
+
 
 settings = Settings()
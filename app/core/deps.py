@@ -1,15 +1,75 @@
+import hashlib
+import time
 import uuid
+from collections.abc import Callable
 
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlmodel import Session, select
+from sqlmodel import Session, SQLModel, select
 
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.core.db import get_db
 from app.core.security import decode_access_token, decode_admin_access_token
 from app.models import Client, User, Role
 
 bearer_scheme = HTTPBearer()
+optional_bearer_scheme = HTTPBearer(auto_error=False)
+
+# Payloads de tokens ya verificados, por (tipo, sha256 del token). Cada
+# entrada vive a lo más hasta el exp del token, así que un token vencido
+# vuelve a decodificarse y se rechaza como antes.
+_token_cache = LRUCache(maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES)
+
+# Clientes y usuarios autenticados por (tipo, id), desligados de la sesión
+# en que se cargaron. Se invalidan cuando cambian; el TTL acota lo que
+# tarda en notarse un cambio hecho fuera de la API.
+_principal_cache = LRUCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+def _decode_cached(kind: str, token: str, decode: Callable[[str], dict]) -> dict:
+    key = (kind, hashlib.sha256(token.encode("utf-8")).digest())
+    payload = _token_cache.get(key)
+    if payload is None:
+        payload = decode(token)
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        if ttl is None or ttl > 0:
+            _token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
+def _load_cached(db: Session, model: type[SQLModel], principal_id: uuid.UUID):
+    key = (model.__name__, principal_id)
+    cached = _principal_cache.get(key)
+    if cached is None:
+        cached = db.exec(select(model).where(model.id == principal_id)).first()
+        if cached is None:
+            return None
+        # Se guarda una copia fuera de la sesión; cada petición recibe su
+        # propia instancia con merge(load=False), sin consultar la base
+        db.expunge(cached)
+        _principal_cache.set(key, cached)
+    return db.merge(cached, load=False)
+
+
+def invalidate_client(client_id: uuid.UUID) -> None:
+    # Llamar después del commit de cualquier cambio a un cliente
+    _principal_cache.pop((Client.__name__, client_id))
+
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    # Llamar después del commit de cualquier cambio a un usuario
+    _principal_cache.pop((User.__name__, user_id))
+
+
+def principal_cache_stats() -> dict:
+    return {
+        "tokens": _token_cache.stats(),
+        "principals": _principal_cache.stats(),
+    }
 
 
 def get_current_client(
@@ -19,7 +79,7 @@ def get_current_client(
     # Extrae y valida el cliente actual del token Bearer.
     token = credentials.credentials
     try:
-        payload = decode_access_token(token)
+        payload = _decode_cached("access", token, decode_access_token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,9 +98,7 @@ def get_current_client(
             detail="Token inválido",
         )
 
-    client = db.exec(
-        select(Client).where(Client.id == uuid.UUID(client_id))
-    ).first()
+    client = _load_cached(db, Client, uuid.UUID(client_id))
 
     if not client:
         raise HTTPException(
@@ -58,7 +116,7 @@ def get_current_user(
     # Extrae y valida el usuario actual del token Bearer.
     token = credentials.credentials
     try:
-        payload = decode_admin_access_token(token)
+        payload = _decode_cached("admin_access", token, decode_admin_access_token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,9 +135,7 @@ def get_current_user(
             detail="Token inválido",
         )
 
-    user = db.exec(
-        select(User).where(User.id == uuid.UUID(user_id))
-    ).first()
+    user = _load_cached(db, User, uuid.UUID(user_id))
 
     if not user or not user.is_active:
         raise HTTPException(
@@ -100,3 +156,25 @@ def require_admin(
             detail="Se requieren permisos de administrador",
         )
     return user
+
+
+def get_idempotency_scope(
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_bearer_scheme),
+) -> str:
+    # Dueño de las llaves Idempotency-Key de la petición: la misma llave de
+    # otro cliente o usuario nunca devuelve su respuesta. Los endpoints que
+    # lo usan son públicos, así que sin token (o con uno inválido) la
+    # petición cae en el ámbito anónimo en lugar de rechazarse.
+    if credentials is None:
+        return "anonymous"
+    for kind, decode, prefix in (
+        ("access", decode_access_token, "client"),
+        ("admin_access", decode_admin_access_token, "user"),
+    ):
+        try:
+            payload = _decode_cached(kind, credentials.credentials, decode)
+        except jwt.InvalidTokenError:
+            continue
+        if payload.get("sub"):
+            return f"{prefix}:{payload['sub']}"
+    return "anonymous"
@@ -1,26 +1,48 @@
+import hashlib
+import json
 import logging
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Protocol
 
 import resend
+from sqlalchemy import exists, update
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
 
 from app.core.config import settings
+from app.models import EmailOutbox, EmailStatus, get_datetime_utc
 
 resend.api_key = settings.RESEND_API_KEY
 
 logger = logging.getLogger(__name__)
 
+# Los correos no se envían dentro de la petición: se guardan en la tabla
+# email_outbox en la misma transacción (enqueue_email) y un proceso en
+# segundo plano (send_pending) los envía por lotes con reintentos.
 
-def send_verification_email(to_email: str, name: str, token: str) -> bool:
-    # Envía un correo de verificación al cliente.
-    # Devuelve True si el correo se envió correctamente, False en caso contrario.
-    verification_url = f"{settings.FRONTEND_HOST}/verify-email?token={token}"
 
-    try:
-        resend.Emails.send(
-            {
-                "from": settings.VERIFY_EMAIL,
-                "to": [to_email],
-                "subject": "Verifica tu cuenta - Pastelería Rouse",
-                "html": f"""
+@dataclass(frozen=True)
+class EmailMessage:
+    sender: str
+    to: str
+    subject: str
+    html: str
+
+
+# ---------- Mensajes ----------
+
+
+def verification_email(to_email: str, name: str, token: str) -> EmailMessage:
+    # Correo de verificación de la cuenta del cliente.
+    verification_url = f"{settings.FRONTEND_HOST}/verify-email?token={token}"
+    return EmailMessage(
+        sender=settings.VERIFY_EMAIL,
+        to=to_email,
+        subject="Verifica tu cuenta - Pastelería Rouse",
+        html=f"""
                 <div style="font-family: 'Inter', Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 40px 20px;">
                     <div style="text-align: center; margin-bottom: 30px;">
                         <h1 style="color: #C8923A; font-family: 'Playfair Display', Georgia, serif; font-size: 28px; margin: 0;">
@@ -54,26 +76,17 @@ def send_verification_email(to_email: str, name: str, token: str) -> bool:
                     </div>
                 </div>
                 """,
-            }
-        )
-        return True
-    except Exception as e:
-        logger.error("Hubo un error al enviar el correo de verificación a %s: %s", to_email, e)
-        return False
+    )
 
 
-def send_password_reset_email(to_email: str, name: str, token: str) -> bool:
-    # Envía un correo de restablecimiento de contraseña al cliente.
-    # Devuelve True si el correo se envió correctamente, False en caso contrario.
+def password_reset_email(to_email: str, name: str, token: str) -> EmailMessage:
+    # Correo para restablecer la contraseña del cliente.
     reset_url = f"{settings.FRONTEND_HOST}/reset-password?token={token}"
-
-    try:
-        resend.Emails.send(
-            {
-                "from": settings.RESET_PASSWORD_EMAIL,
-                "to": [to_email],
-                "subject": "Restablecer contraseña - Pastelería Rouse",
-                "html": f"""
+    return EmailMessage(
+        sender=settings.RESET_PASSWORD_EMAIL,
+        to=to_email,
+        subject="Restablecer contraseña - Pastelería Rouse",
+        html=f"""
                 <div style="font-family: 'Inter', Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 40px 20px;">
                     <div style="text-align: center; margin-bottom: 30px;">
                         <h1 style="color: #C8923A; font-family: 'Playfair Display', Georgia, serif; font-size: 28px; margin: 0;">
@@ -107,9 +120,231 @@ def send_password_reset_email(to_email: str, name: str, token: str) -> bool:
                     </div>
                 </div>
                 """,
-            }
+    )
+
+
+# ---------- Transportes ----------
+
+
+class BatchRejected(Exception):
+    """El proveedor rechazó el contenido del lote; reintentarlo igual no sirve."""
+
+
+class EmailTransport(Protocol):
+    # Envía un lote completo o lanza una excepción (el lote se reintenta;
+    # con BatchRejected se separa en correos sueltos)
+    def send_batch(self, messages: list[EmailMessage], idempotency_key: str) -> None: ...
+
+
+class ResendTransport:
+    """Envía por la API de lotes de Resend (hasta 100 correos por llamada)."""
+
+    def send_batch(self, messages: list[EmailMessage], idempotency_key: str) -> None:
+        try:
+            resend.Batch.send(
+                [
+                    {"from": m.sender, "to": [m.to], "subject": m.subject, "html": m.html}
+                    for m in messages
+                ],
+                # Si el envío llegó a Resend pero no se registró aquí, el
+                # reintento del mismo lote no duplica los correos
+                {"idempotency_key": idempotency_key},
+            )
+        except (
+            resend.exceptions.ValidationError,
+            resend.exceptions.MissingRequiredFieldsError,
+        ) as e:
+            # Resend valida el lote entero: un correo inválido lo rechaza todo
+            raise BatchRejected(str(e)) from e
+
+
+class FileTransport:
+    """Escribe cada correo como JSON en un directorio (desarrollo local)."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def send_batch(self, messages: list[EmailMessage], idempotency_key: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for message in messages:
+            path = self.directory / f"{uuid.uuid4()}.json"
+            path.write_text(json.dumps(asdict(message), ensure_ascii=False), encoding="utf-8")
+
+
+class MemoryTransport:
+    """Guarda los correos en una lista (pruebas)."""
+
+    def __init__(self):
+        self.sent: list[EmailMessage] = []
+
+    def send_batch(self, messages: list[EmailMessage], idempotency_key: str) -> None:
+        self.sent.extend(messages)
+
+
+# Una sola instancia por proceso, para poder leer lo que enviaron la API y el job
+_memory_transport = MemoryTransport()
+
+
+def get_transport() -> EmailTransport:
+    if settings.EMAIL_TRANSPORT == "file":
+        return FileTransport(Path(settings.EMAIL_FILE_DIR))
+    if settings.EMAIL_TRANSPORT == "memory":
+        return _memory_transport
+    return ResendTransport()
+
+
+# ---------- Outbox ----------
+
+
+def enqueue_email(db: Session, message: EmailMessage) -> None:
+    # Se confirma junto con el resto de la transacción de la petición
+    db.add(
+        EmailOutbox(
+            sender=message.sender,
+            to_email=message.to,
+            subject=message.subject,
+            html=message.html,
+        )
+    )
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    # Backoff exponencial: 30 s, 1 min, 2 min, ... hasta 1 hora
+    return timedelta(seconds=min(30 * 2 ** (attempts - 1), 3600))
+
+
+def _batch_key(ids: list[int]) -> str:
+    return hashlib.sha256(",".join(str(i) for i in ids).encode("utf-8")).hexdigest()
+
+
+def _claim_batch(db: Session, now: datetime, batch_size: int) -> list[EmailOutbox]:
+    # Primero los lotes que ya fallaron y toca reintentar. Se bloquea solo la
+    # fila de menor id de cada lote, así dos procesos nunca se reparten un lote.
+    earlier = aliased(EmailOutbox)
+    batch_key = db.exec(
+        select(EmailOutbox.batch_key)
+        .where(
+            EmailOutbox.status == EmailStatus.PENDING,
+            EmailOutbox.next_attempt_at <= now,
+            EmailOutbox.batch_key.is_not(None),
+            ~exists().where(
+                earlier.batch_key == EmailOutbox.batch_key, earlier.id < EmailOutbox.id
+            ),
+        )
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if batch_key is not None:
+        return list(
+            db.exec(
+                select(EmailOutbox)
+                .where(
+                    EmailOutbox.batch_key == batch_key,
+                    EmailOutbox.status == EmailStatus.PENDING,
+                )
+                .order_by(EmailOutbox.id)
+                .with_for_update()
+            ).all()
+        )
+
+    # Si no hay reintentos pendientes se arma un lote nuevo
+    rows = list(
+        db.exec(
+            select(EmailOutbox)
+            .where(
+                EmailOutbox.status == EmailStatus.PENDING,
+                EmailOutbox.next_attempt_at <= now,
+                EmailOutbox.batch_key.is_(None),
+            )
+            .order_by(EmailOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+    )
+    if rows:
+        batch_key = _batch_key([r.id for r in rows])
+        for row in rows:
+            row.batch_key = batch_key
+            db.add(row)
+    return rows
+
+
+def send_pending(
+    db: Session,
+    transport: EmailTransport | None = None,
+    batch_size: int = settings.EMAIL_OUTBOX_BATCH_SIZE,
+) -> int:
+    # Envía los correos pendientes por lotes y devuelve cuántos se enviaron.
+    # FOR UPDATE SKIP LOCKED: varios procesos pueden vaciar la cola a la vez
+    # sin tomar el mismo correo dos veces.
+    transport = transport or get_transport()
+    sent = 0
+    while True:
+        now = get_datetime_utc()
+        rows = _claim_batch(db, now, batch_size)
+        if not rows:
+            return sent
+
+        ids = [r.id for r in rows]
+        batch_key = rows[0].batch_key
+        attempts = rows[0].attempts + 1
+        messages = [
+            EmailMessage(sender=r.sender, to=r.to_email, subject=r.subject, html=r.html)
+            for r in rows
+        ]
+        # El lote se reserva y se confirma antes de enviarlo: la llamada a
+        # Resend no retiene una transacción abierta, y si el proceso muere a
+        # medio envío el lote se reintenta con la misma llave al vencer la reserva
+        for row in rows:
+            row.next_attempt_at = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+            db.add(row)
+        db.commit()
+
+        batch = update(EmailOutbox).where(
+            EmailOutbox.batch_key == batch_key, EmailOutbox.status == EmailStatus.PENDING
+        )
+        try:
+            transport.send_batch(messages, f"email-outbox-{batch_key}")
+        except BatchRejected as e:
+            if len(ids) > 1:
+                # Un correo inválido no debe frenar a los demás: cada uno
+                # pasa a ser su propio lote y se reintenta de inmediato
+                logger.warning("Lote de %s correos rechazado, se separa: %s", len(ids), e)
+                split = update(EmailOutbox).where(EmailOutbox.status == EmailStatus.PENDING)
+                for row_id in ids:
+                    db.exec(
+                        split.where(EmailOutbox.id == row_id).values(
+                            batch_key=_batch_key([row_id]), next_attempt_at=get_datetime_utc()
+                        )
+                    )
+            else:
+                logger.error("Correo %s rechazado, se descarta: %s", ids[0], e)
+                db.exec(
+                    batch.values(
+                        attempts=attempts, status=EmailStatus.FAILED, last_error=str(e)[:1000]
+                    )
+                )
+            db.commit()
+            continue
+        except Exception as e:
+            logger.error("No se pudo enviar un lote de %s correos: %s", len(messages), e)
+            if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                outcome = {"status": EmailStatus.FAILED}
+            else:
+                outcome = {"next_attempt_at": get_datetime_utc() + _retry_delay(attempts)}
+            db.exec(batch.values(attempts=attempts, last_error=str(e)[:1000], **outcome))
+            db.commit()
+            # El resto de la cola se intenta en la siguiente ejecución
+            return sent
+
+        db.exec(
+            batch.values(
+                attempts=attempts,
+                status=EmailStatus.SENT,
+                sent_at=get_datetime_utc(),
+                last_error=None,
+            )
         )
-        return True
-    except Exception as e:
-        logger.error("Hubo un error al enviar el correo de restablecimiento de contraseña a %s: %s", to_email, e)
-        return False
+        db.commit()
+        sent += len(messages)
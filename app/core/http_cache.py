@@ -0,0 +1,58 @@
+from fastapi import Request, Response
+
+# El catálogo se puede guardar en cualquier caché, pero siempre se revalida
+# con el ETag para que nunca se muestren precios viejos
+CATALOG_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match usa comparación débil (RFC 9110): se ignora el prefijo W/
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str = CATALOG_CACHE_CONTROL,
+) -> Response | None:
+    # Agrega ETag y Cache-Control a la respuesta; si el cliente ya tiene
+    # esa versión devuelve un 304 sin cuerpo para responder directamente
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def select_encoding(accept_encoding: str | None, available: list[str]) -> str:
+    # Elige la primera codificación disponible (en orden de preferencia del
+    # servidor) que el cliente acepte; si no acepta ninguna se manda sin comprimir
+    accepted: dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
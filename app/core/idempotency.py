@@ -0,0 +1,82 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import IdempotencyKey, get_datetime_utc
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+
+def fingerprint(data: BaseModel) -> str:
+    # Hash del cuerpo ya validado; el mismo pedido siempre da el mismo hash
+    return hashlib.sha256(data.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Las columnas son timestamp sin zona horaria: según el driver la fecha
+    # puede llegar sin tzinfo, y se interpreta como UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def replay(db: Session, scope: str, key: str, request_hash: str) -> Response | None:
+    # Devuelve la respuesta guardada si la llave ya se usó en este ámbito
+    # (cliente, usuario o anónimo) y sigue vigente
+    stored = db.get(IdempotencyKey, (scope, key))
+    if stored is None:
+        return None
+    if _as_utc(stored.expires_at) <= get_datetime_utc():
+        # La llave expiró: se borra para poder reutilizarla en esta petición
+        db.delete(stored)
+        db.flush()
+        return None
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{IDEMPOTENCY_KEY_HEADER} was already used with a different request",
+        )
+    return Response(
+        content=stored.response_body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def remember(
+    db: Session, scope: str, key: str, request_hash: str, status_code: int, body: BaseModel
+) -> None:
+    # Se guarda en la misma transacción que el trabajo de la petición:
+    # o se confirman ambos o ninguno
+    now = get_datetime_utc()
+    db.add(
+        IdempotencyKey(
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            status_code=status_code,
+            response_body=body.model_dump_json(),
+            created_at=now,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        )
+    )
+
+
+def purge_expired(db: Session, batch_size: int = 5000) -> int:
+    # Borra las llaves expiradas por lotes para no bloquear la tabla mucho tiempo
+    total = 0
+    while True:
+        expired = select(IdempotencyKey.key).where(
+            IdempotencyKey.expires_at <= get_datetime_utc()
+        ).limit(batch_size)
+        result = db.exec(delete(IdempotencyKey).where(IdempotencyKey.key.in_(expired)))
+        db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
@@ -0,0 +1,36 @@
+import sqlalchemy as sa
+from sqlmodel import Session
+
+from app.core.config import settings
+
+# order_audit está particionada por mes sobre changed_at (migración 0014).
+# Las funciones SQL fn_order_audit_create_partitions/drop_partitions hacen
+# el trabajo; aquí solo se calculan los límites a partir de la configuración.
+
+
+def maintain_partitions(
+    db: Session,
+    months_ahead: int = settings.ORDER_AUDIT_PARTITIONS_AHEAD_MONTHS,
+    retention_months: int = settings.ORDER_AUDIT_RETENTION_MONTHS,
+) -> tuple[int, int]:
+    # Crea las particiones del mes actual y los siguientes, para que las
+    # filas nunca caigan en la partición DEFAULT
+    created = db.exec(
+        sa.text("""
+            SELECT fn_order_audit_create_partitions(
+                CURRENT_DATE, (CURRENT_DATE + make_interval(months => :months))::DATE
+            )
+        """),
+        params={"months": months_ahead},
+    ).scalar_one()
+    # Borra las particiones que terminaron antes del periodo de retención
+    dropped = db.exec(
+        sa.text("""
+            SELECT fn_order_audit_drop_partitions(
+                (date_trunc('month', CURRENT_DATE) - make_interval(months => :months))::DATE
+            )
+        """),
+        params={"months": retention_months},
+    ).scalar_one()
+    db.commit()
+    return created, dropped
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+
+from app.core.db import engine
+
+logger = logging.getLogger(__name__)
+
+# Canal en el que fn_audit_order publica cada fila de order_audit
+ORDER_EVENTS_CHANNEL = "order_events"
+
+
+class Subscription:
+    """Cola de eventos de un cliente conectado al stream."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=maxsize)
+        # Si el cliente no consume a tiempo (o se perdió la conexión LISTEN)
+        # se marca para que se reconecte y recupere lo perdido desde order_audit
+        self.overflowed = False
+
+    def push(self, event: dict) -> None:
+        # Corre dentro del event loop del cliente
+        if self.queue.full():
+            self.overflowed = True
+            return
+        self.queue.put_nowait(event)
+
+
+class OrderEventBroker:
+    """Una sola conexión LISTEN por proceso que reparte los eventos a todos los suscriptores."""
+
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if engine.dialect.name != "postgresql":
+            logger.warning("LISTEN/NOTIFY requiere PostgreSQL; el stream de órdenes queda deshabilitado")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="order-events", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _publish(self, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.push, event)
+
+    def _resync(self) -> None:
+        # Tras perder la conexión no se sabe qué eventos se perdieron:
+        # todos los clientes se reconectan y los recuperan con Last-Event-ID
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.overflowed = True
+            subscription.loop.call_soon_threadsafe(subscription.push, {})
+
+    def _run(self) -> None:
+        attempt = 0
+        while not self._stop.is_set():
+            connection = None
+            try:
+                # Conexión dedicada fuera del pool, en autocommit para recibir NOTIFY
+                connection = engine.raw_connection()
+                connection.detach()
+                dbapi_connection = connection.driver_connection
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {ORDER_EVENTS_CHANNEL}")
+                if attempt:
+                    self._resync()
+                attempt = 0
+
+                while not self._stop.is_set():
+                    if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        notify = dbapi_connection.notifies.pop(0)
+                        try:
+                            self._publish(json.loads(notify.payload))
+                        except ValueError:
+                            logger.error("Evento de orden inválido: %s", notify.payload)
+            except Exception as e:
+                attempt += 1
+                logger.error("Se perdió la conexión LISTEN de órdenes (intento %s): %s", attempt, e)
+                self._stop.wait(min(30, 2 ** attempt))
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+order_events = OrderEventBroker()
@@ -0,0 +1,206 @@
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+
+import sqlalchemy as sa
+from sqlmodel import Session, select
+
+from app.models import Order, OrderDetail
+
+# Exportación de órdenes con sus detalles (una fila por línea de orden).
+# Las filas se leen con un cursor del lado del servidor en bloques de
+# EXPORT_CHUNK_SIZE y cada bloque se codifica y se entrega antes de leer
+# el siguiente, así la memoria no depende del número de filas.
+
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_COLUMNS = (
+    Order.id.label("order_id"),
+    Order.ticket_number,
+    Order.created_at,
+    Order.client_id,
+    Order.client_name,
+    Order.phone,
+    Order.delivery_address,
+    Order.status,
+    Order.payment_method,
+    Order.payment_status,
+    Order.notes,
+    Order.total,
+    OrderDetail.id.label("detail_id"),
+    OrderDetail.product_id,
+    OrderDetail.variant_name,
+    OrderDetail.quantity,
+    OrderDetail.unit_price,
+    OrderDetail.subtotal,
+)
+COLUMN_NAMES = [column.key for column in EXPORT_COLUMNS]
+
+
+def export_chunks(
+    db: Session,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[list[sa.Row]]:
+    query = (
+        select(*EXPORT_COLUMNS)
+        .outerjoin(OrderDetail, OrderDetail.order_id == Order.id)
+        .order_by(Order.id, OrderDetail.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    if date_from is not None:
+        query = query.where(Order.created_at >= date_from)
+    if date_to is not None:
+        query = query.where(Order.created_at < date_to)
+    yield from db.exec(query).partitions()
+
+
+def _plain(value):
+    # Valores como texto para CSV y JSON (fechas en ISO 8601, UUID, Decimal)
+    if value is None or isinstance(value, (int, str)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_csv(chunks: Iterable[list[sa.Row]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMN_NAMES)
+    for rows in chunks:
+        writer.writerows([[_plain(v) for v in row] for row in rows])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(chunks: Iterable[list[sa.Row]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(COLUMN_NAMES, map(_plain, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Archivo de solo escritura que guarda lo escrito hasta que se drena.
+
+    ``tell()`` cuenta todos los bytes escritos: el pie del Parquet guarda
+    offsets absolutos aunque los bloques ya se hayan enviado.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("order_id", pa.int64()),
+        ("ticket_number", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("client_id", pa.string()),
+        ("client_name", pa.string()),
+        ("phone", pa.string()),
+        ("delivery_address", pa.string()),
+        ("status", pa.string()),
+        ("payment_method", pa.string()),
+        ("payment_status", pa.string()),
+        ("notes", pa.string()),
+        ("total", pa.decimal128(10, 2)),
+        ("detail_id", pa.int64()),
+        ("product_id", pa.int64()),
+        ("variant_name", pa.string()),
+        ("quantity", pa.int64()),
+        ("unit_price", pa.decimal128(10, 2)),
+        ("subtotal", pa.decimal128(10, 2)),
+    ])
+
+
+def encode_parquet(chunks: Iterable[list[sa.Row]]) -> Iterator[bytes]:
+    # pyarrow solo se importa si se pide Parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    # Un row group por bloque leído
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            columns[3] = [str(v) if v is not None else None for v in columns[3]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "csv": encode_csv,
+    "ndjson": encode_ndjson,
+    "parquet": encode_parquet,
+}
+
+
+def stream_export(
+    db: Session,
+    export_format: str,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> Iterator[bytes]:
+    for data in ENCODERS[export_format](export_chunks(db, date_from, date_to)):
+        if data:
+            yield data
+
+
+def write_export(
+    db: Session,
+    export_format: str,
+    path: Path,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> int:
+    # Escribe a un archivo temporal y lo renombra al terminar, para que
+    # quien lo recoja nunca vea una exportación a medias
+    partial = path.with_name(path.name + ".partial")
+    written = 0
+    with partial.open("wb") as f:
+        for data in stream_export(db, export_format, date_from, date_to):
+            f.write(data)
+            written += len(data)
+    partial.replace(path)
+    return written
@@ -0,0 +1,30 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+# Cursores opacos para paginación keyset.
+# Se codifican los valores de la última fila de la página (por ejemplo
+# (created_at, id)) y la siguiente página empieza justo después de ella.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: int | str | datetime) -> str:
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    # Devuelve los valores del cursor convertidos a los tipos esperados
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("cursor length")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for t, v in zip(types, raw)
+        )
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,123 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# bcrypt consume ~250 ms de CPU por hash. Se hace en un pool de procesos
+# dedicado para que una ola de logins no ocupe los hilos ni la CPU que
+# usan el resto de las peticiones, y con un tope de trabajos en curso:
+# pasado el tope se responde 503 en lugar de encolar sin límite.
+
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+class PasswordHasher:
+    """Pool de procesos para bcrypt con límite de trabajos pendientes."""
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Los procesos se crean con el primer hash; "spawn" evita copiar con
+        # fork los hilos del proceso de la API (LISTEN, tareas periódicas)
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Pool de contraseñas saturado (%s pendientes)", self.max_pending)
+            raise HTTPException(
+                status_code=503,
+                detail="Servicio ocupado, inténtalo de nuevo en unos segundos.",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            return self._get_executor().submit(func, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password.encode("utf-8"), self.rounds).decode("utf-8")
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return self._run(_check, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        # Formato $2b$<costo>$<sal+hash>: se rehashea si el costo no es el configurado
+        try:
+            return int(password_hash.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+passwords = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+def hash_password(password: str) -> str:
+    return passwords.hash(password)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return passwords.verify(password, password_hash)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    return passwords.needs_rehash(password_hash)
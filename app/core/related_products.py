@@ -0,0 +1,99 @@
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, insert
+from sqlmodel import Session, func, select
+
+from app.models import Order, OrderDetail, OrderStatus, Product, ProductRelated
+
+# "Comprados juntos": matriz de co-ocurrencia producto × producto.
+# Con X = matriz órdenes × productos (1 si la orden incluye el producto),
+# C = Xᵀ·X cuenta en cuántas órdenes aparece cada par. Los detalles se leen
+# en bloques ordenados por order_id y cada bloque suma su Xᵀ·X a C, así la
+# memoria depende del número de pares distintos y no de las líneas de orden.
+
+
+def _order_lines(db: Session, chunk_size: int):
+    # Pares (order_id, product_id) distintos de órdenes no canceladas,
+    # en bloques de chunk_size filas con cursor del lado del servidor
+    query = (
+        select(OrderDetail.order_id, OrderDetail.product_id)
+        .join(Order, Order.id == OrderDetail.order_id)
+        .where(Order.status != OrderStatus.CANCELLED)
+        .distinct()
+        .order_by(OrderDetail.order_id, OrderDetail.product_id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for rows in db.exec(query).partitions():
+        lines = np.array(rows, dtype=np.int64)
+        yield lines[:, 0], lines[:, 1]
+
+
+def _chunk_cooccurrence(orders: np.ndarray, products: np.ndarray, size: int) -> sparse.csr_matrix:
+    _, order_index = np.unique(orders, return_inverse=True)
+    x = sparse.csr_matrix(
+        (np.ones(len(products), dtype=np.float64), (order_index, products)),
+        shape=(order_index.max() + 1, size),
+    )
+    return (x.T @ x).tocsr()
+
+
+def cooccurrence(db: Session, chunk_size: int = 100_000) -> sparse.csr_matrix:
+    size = (db.exec(select(func.max(Product.id))).one() or 0) + 1
+    matrix = sparse.csr_matrix((size, size), dtype=np.float64)
+
+    pending_orders = np.empty(0, dtype=np.int64)
+    pending_products = np.empty(0, dtype=np.int64)
+    for orders, products in _order_lines(db, chunk_size):
+        orders = np.concatenate([pending_orders, orders])
+        products = np.concatenate([pending_products, products])
+        # La última orden del bloque puede continuar en el siguiente:
+        # se guarda para sumarla completa con él
+        complete = orders != orders[-1]
+        pending_orders, pending_products = orders[~complete], products[~complete]
+        if complete.any():
+            matrix += _chunk_cooccurrence(orders[complete], products[complete], size)
+    if len(pending_orders):
+        matrix += _chunk_cooccurrence(pending_orders, pending_products, size)
+    return matrix
+
+
+def top_neighbours(matrix: sparse.csr_matrix, top_k: int):
+    # Similitud coseno entre productos: C_ij / sqrt(C_ii · C_jj), para que
+    # los productos que aparecen en casi todas las órdenes no dominen
+    counts = matrix.diagonal()
+    coo = matrix.tocoo()
+    keep = coo.row != coo.col
+    rows, cols, values = coo.row[keep], coo.col[keep], coo.data[keep]
+    scores = values / np.sqrt(counts[rows] * counts[cols])
+
+    # Ordena por producto y score descendente, y conserva los primeros top_k de cada producto
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    starts = np.searchsorted(rows, rows, side="left")
+    ranks = np.arange(len(rows)) - starts + 1
+    keep = ranks <= top_k
+    return rows[keep], ranks[keep], cols[keep], scores[keep]
+
+
+def rebuild(db: Session, top_k: int, chunk_size: int = 100_000) -> int:
+    products, ranks, related, scores = top_neighbours(cooccurrence(db, chunk_size), top_k)
+
+    # Reemplaza la tabla en una sola transacción; los lectores ven la
+    # versión anterior hasta el commit
+    db.exec(delete(ProductRelated))
+    for start in range(0, len(products), chunk_size):
+        stop = start + chunk_size
+        db.exec(
+            insert(ProductRelated),
+            params=[
+                {"product_id": p, "rank": r, "related_product_id": q, "score": s}
+                for p, r, q, s in zip(
+                    products[start:stop].tolist(),
+                    ranks[start:stop].tolist(),
+                    related[start:stop].tolist(),
+                    scores[start:stop].tolist(),
+                )
+            ],
+        )
+    db.commit()
+    return len(products)
@@ -0,0 +1,140 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+import sqlalchemy as sa
+from sqlalchemy import delete, insert
+from sqlmodel import Session, func, select
+
+from app.models import Order, OrderDetail, SalesDaily, SalesDailyDelta
+
+# Los triggers de la migración 0024 anotan cada cambio de órdenes como un
+# delta en sales_daily_delta (solo INSERT, sin locks sobre filas
+# compartidas) y fold() los suma periódicamente a sales_daily.  La
+# reconstrucción solo hace falta si se sospecha que se desincronizó
+# (p. ej. tras cargar datos con los triggers desactivados).
+
+_FOLD = sa.text("""
+    WITH folded AS (
+        DELETE FROM sales_daily_delta
+        RETURNING day, status, payment_status, order_count, revenue, item_count
+    ),
+    upserted AS (
+        INSERT INTO sales_daily AS s (day, status, payment_status, order_count, revenue, item_count)
+        SELECT day, status, payment_status, SUM(order_count), SUM(revenue), SUM(item_count)
+        FROM folded
+        GROUP BY day, status, payment_status
+        ORDER BY day, status, payment_status
+        ON CONFLICT (day, status, payment_status) DO UPDATE
+        SET order_count = s.order_count + EXCLUDED.order_count,
+            revenue = s.revenue + EXCLUDED.revenue,
+            item_count = s.item_count + EXCLUDED.item_count
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM upserted
+""")
+
+
+def fold(db: Session) -> int:
+    # Borra los deltas visibles y los suma a sales_daily en la misma
+    # sentencia; los buckets se actualizan en orden de clave para no
+    # cruzarse con otro fold.  Devuelve cuántos buckets cambiaron.
+    buckets = db.exec(_FOLD).scalar_one()
+    db.commit()
+    return buckets
+
+
+def current_rollup(first_day: date, last_day: date):
+    # sales_daily más los deltas que aún no se pasan, para leer al día
+    def bucket_rows(model):
+        return select(
+            model.day,
+            model.status,
+            model.payment_status,
+            model.order_count,
+            model.revenue,
+            model.item_count,
+        ).where(model.day >= first_day, model.day <= last_day)
+
+    return sa.union_all(bucket_rows(SalesDaily), bucket_rows(SalesDailyDelta)).subquery(
+        "sales_daily_current"
+    )
+
+
+def _lock(db: Session) -> None:
+    # El lock EXCLUSIVE sobre los deltas espera a las escrituras de órdenes
+    # en curso y detiene las nuevas en su trigger hasta el commit; el de
+    # sales_daily espera a un fold en curso (mismo orden de tablas que fold)
+    db.exec(sa.text("LOCK TABLE sales_daily_delta, sales_daily IN EXCLUSIVE MODE"))
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def rebuild_days(db: Session, first_day: date, last_day: date) -> None:
+    # Recalcula los días [first_day, last_day] dentro de la transacción actual.
+    # Con los locks los deltas de esos días ya están en las órdenes leídas,
+    # así que se descartan junto con sus buckets y nada se cuenta dos veces.
+    _lock(db)
+    for model in (SalesDaily, SalesDailyDelta):
+        db.exec(delete(model).where(model.day >= first_day, model.day <= last_day))
+
+    in_range = sa.and_(
+        Order.created_at >= _day_start(first_day),
+        Order.created_at < _day_start(last_day + timedelta(days=1)),
+    )
+    items = (
+        select(OrderDetail.order_id, func.sum(OrderDetail.quantity).label("item_count"))
+        .join(Order, Order.id == OrderDetail.order_id)
+        .where(in_range)
+        .group_by(OrderDetail.order_id)
+        .subquery()
+    )
+    day = sa.cast(Order.created_at, sa.Date)
+    rollup = (
+        select(
+            day,
+            Order.status,
+            Order.payment_status,
+            func.count(),
+            func.sum(Order.total),
+            func.coalesce(func.sum(items.c.item_count), 0),
+        )
+        .outerjoin(items, items.c.order_id == Order.id)
+        .where(in_range)
+        .group_by(day, Order.status, Order.payment_status)
+    )
+    db.exec(
+        insert(SalesDaily).from_select(
+            ["day", "status", "payment_status", "order_count", "revenue", "item_count"],
+            rollup,
+        )
+    )
+
+
+def rebuild(db: Session, batch_days: int = 31) -> int:
+    # Recalcula todo el rollup desde las órdenes, un lote de días por transacción
+    # para no bloquear las escrituras de órdenes más que unos instantes
+    # El rango se lee ya con los locks: una orden nueva fuera de él no
+    # puede dejar un delta que luego se borre sin contarse
+    _lock(db)
+    first, last = db.exec(select(func.min(Order.created_at), func.max(Order.created_at))).one()
+    if first is None:
+        db.exec(delete(SalesDaily))
+        db.exec(delete(SalesDailyDelta))
+        db.commit()
+        return 0
+
+    first_day, last_day = first.date(), last.date()
+    for model in (SalesDaily, SalesDailyDelta):
+        db.exec(delete(model).where(sa.or_(model.day < first_day, model.day > last_day)))
+    db.commit()
+
+    batches = 0
+    start = first_day
+    while start <= last_day:
+        stop = min(start + timedelta(days=batch_days - 1), last_day)
+        rebuild_days(db, start, stop)
+        db.commit()
+        batches += 1
+        start = stop + timedelta(days=1)
+    return batches
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import sqlalchemy as sa
+from sqlmodel import Session
+
+from app.core.db import engine
+
+logger = logging.getLogger(__name__)
+
+# Segundos tras el arranque antes de la primera ejecución de cada tarea
+FIRST_RUN_DELAY = 60.0
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float
+    func: Callable[[Session], object]
+    next_run: float = 0.0
+
+
+class Scheduler:
+    """Tareas periódicas dentro del proceso de la API.
+
+    Cada ejecución toma un advisory lock de Postgres con el nombre de la
+    tarea, así que con varios workers o réplicas solo uno la corre a la vez;
+    los demás se la saltan hasta el siguiente intervalo.
+    """
+
+    def __init__(self):
+        self._jobs: list[Job] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, name: str, interval: float, func: Callable[[Session], object]) -> None:
+        # Registrar de nuevo una tarea con el mismo nombre la reemplaza
+        self._jobs = [job for job in self._jobs if job.name != name]
+        self._jobs.append(Job(name=name, interval=interval, func=func))
+
+    def start(self) -> None:
+        if engine.dialect.name != "postgresql":
+            logger.warning("Las tareas periódicas requieren PostgreSQL; quedan deshabilitadas")
+            return
+        if not self._jobs:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def run_job(self, job: Job) -> bool:
+        # La sesión usa una sola conexión para que el lock (de sesión)
+        # se tome y se libere en la misma, aunque la tarea haga commit
+        with engine.connect() as connection:
+            locked = connection.execute(
+                sa.text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": job.name}
+            ).scalar()
+            connection.commit()
+            if not locked:
+                return False
+            try:
+                with Session(bind=connection) as db:
+                    job.func(db)
+            finally:
+                connection.rollback()
+                connection.execute(
+                    sa.text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": job.name}
+                )
+                connection.commit()
+        return True
+
+    def _run(self) -> None:
+        # La primera ejecución espera un poco tras el arranque (a lo más
+        # FIRST_RUN_DELAY), para que las tareas largas corran aunque el
+        # proceso se reinicie más seguido que su intervalo
+        now = time.monotonic()
+        for job in self._jobs:
+            job.next_run = now + min(job.interval, FIRST_RUN_DELAY)
+
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for job in self._jobs:
+                if job.next_run > now:
+                    continue
+                try:
+                    self.run_job(job)
+                except Exception:
+                    logger.exception("La tarea %s falló", job.name)
+                job.next_run = time.monotonic() + job.interval
+            next_run = min(job.next_run for job in self._jobs)
+            self._stop.wait(max(next_run - time.monotonic(), 0.0))
+
+
+scheduler = Scheduler()
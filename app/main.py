@@ -1,15 +1,40 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.api.endpoints import api_router
+from app.core import best_sellers, email, order_audit, sales_daily
 from app.core.config import settings
+from app.core.order_events import order_events
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.passwords import passwords
+from app.core.scheduler import scheduler
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Una conexión LISTEN por proceso para el stream de órdenes
+    order_events.start()
+    # Tareas periódicas; el advisory lock evita que corran en varios procesos a la vez
+    scheduler.add(
+        "refresh-best-sellers", settings.BEST_SELLERS_REFRESH_SECONDS, best_sellers.refresh
+    )
+    scheduler.add("fold-sales-daily", settings.SALES_DAILY_FOLD_SECONDS, sales_daily.fold)
+    scheduler.add("maintain-order-audit", 24 * 60 * 60, order_audit.maintain_partitions)
+    scheduler.add("send-emails", settings.EMAIL_OUTBOX_POLL_SECONDS, email.send_pending)
+    scheduler.start()
+    yield
+    scheduler.stop()
+    order_events.stop()
+    passwords.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origin = settings.FRONTEND_HOST
 
@@ -20,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", NEXT_CURSOR_HEADER],
 )
 
 # Funcion para manejar errores globales que no son manejados por los endpoints
@@ -1,5 +1,5 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from decimal import Decimal
 from enum import StrEnum
 
@@ -50,6 +50,12 @@ class PaymentMethod(StrEnum):
     TRANSFER = "transferencia"
 
 
+class EmailStatus(StrEnum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
 def get_datetime_utc() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -79,9 +85,15 @@ class Client(SQLModel, table=True):
 class ClientCartItem(SQLModel, table=True):
     """Persisted cart item for an authenticated client."""
     __tablename__ = "client_cart_item"
+    __table_args__ = (
+        sa.Index(
+            "uq_client_cart_item_client_id_product_id", "client_id", "product_id", unique=True
+        ),
+        sa.CheckConstraint("quantity > 0", name="ck_client_cart_item_quantity_positive"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
-    client_id: uuid.UUID = Field(foreign_key="client.id", index=True)
+    client_id: uuid.UUID = Field(foreign_key="client.id")
     product_id: str = Field(max_length=200)
     product_name: str = Field(max_length=200)
     product_price: float
@@ -97,6 +109,10 @@ class Category(SQLModel, table=True):
     name: str = Field(max_length=100)
     description: str | None = Field(default=None)
     created_at: datetime = Field(default_factory=get_datetime_utc)
+    updated_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_column_kwargs={"onupdate": get_datetime_utc},
+    )
 
     products: list["Product"] = Relationship(back_populates="category")
 
@@ -107,6 +123,10 @@ class Product(SQLModel, table=True):
     description: str | None = Field(default=None)
     is_active: bool = Field(default=True)
     created_at: datetime = Field(default_factory=get_datetime_utc)
+    updated_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_column_kwargs={"onupdate": get_datetime_utc},
+    )
 
     category: Category = Relationship(back_populates="products")
     variants: list["ProductVariant"] = Relationship(
@@ -114,21 +134,59 @@ class Product(SQLModel, table=True):
     )
 
 class ProductVariant(SQLModel, table=True):
+    __table_args__ = (
+        sa.Index("uq_productvariant_product_id_name", "product_id", "name", unique=True),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    product_id: int = Field(foreign_key="product.id", index=True)
+    product_id: int = Field(foreign_key="product.id")
     name: str = Field(max_length=100)
     price: Decimal = Field(max_digits=10, decimal_places=2)
     image_path: str | None = Field(default=None, max_length=500)
     created_at: datetime = Field(default_factory=get_datetime_utc)
+    updated_at: datetime = Field(
+        default_factory=get_datetime_utc,
+        sa_column_kwargs={"onupdate": get_datetime_utc},
+    )
 
     product: Product = Relationship(back_populates="variants")
 
+class CatalogChange(SQLModel, table=True):
+    """Change log of catalog rows, written by the fn_catalog_change trigger.
+
+    The id is the cursor clients pass to ``GET /catalog/changes``.
+    """
+    __tablename__ = "catalog_change"
+
+    id: int | None = Field(default=None, primary_key=True, sa_type=sa.BigInteger)
+    entity: str = Field(max_length=20)
+    entity_id: int
+    action: str = Field(max_length=10)
+    changed_at: datetime = Field(default_factory=get_datetime_utc)
+
+
 class Order(SQLModel, table=True):
+    __table_args__ = (
+        sa.Index("ix_order_created_at_id", "created_at", "id"),
+        sa.Index("ix_order_status_created_at_id", "status", "created_at", "id"),
+        sa.Index("ix_order_payment_status_created_at_id", "payment_status", "created_at", "id"),
+        sa.Index("ix_order_client_id_id", "client_id", "id"),
+        sa.Index(
+            "ix_order_created_at_status", "created_at", "status",
+            postgresql_include=["payment_status", "total", "id"],
+        ),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    ticket_number: str = Field(max_length=50, unique=True)
-    client_id: uuid.UUID | None = Field(
-        default=None, foreign_key="client.id", index=True
+    # Lo asigna Postgres al insertar (secuencia order_ticket_seq) y se lee con RETURNING
+    ticket_number: str | None = Field(
+        default=None,
+        max_length=50,
+        unique=True,
+        nullable=False,
+        sa_column_kwargs={"server_default": sa.text("fn_next_ticket_number()")},
     )
+    client_id: uuid.UUID | None = Field(default=None, foreign_key="client.id")
     client_name: str = Field(max_length=150)
     phone: str = Field(max_length=20)
     delivery_address: str
@@ -158,10 +216,14 @@ class OrderDetail(SQLModel, table=True):
 
 
 class OrderAudit(SQLModel, table=True):
+    """Order change log, partitioned by month on changed_at (see migration 0014)."""
     __tablename__ = "order_audit"
+    __table_args__ = (
+        sa.Index("ix_order_audit_order_id_changed_at_id", "order_id", "changed_at", "id"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
-    order_id: int = Field(index=True)
+    order_id: int
     action: str = Field(max_length=10)
     old_status: str | None = Field(default=None, max_length=50)
     new_status: str | None = Field(default=None, max_length=50)
@@ -169,5 +231,107 @@ class OrderAudit(SQLModel, table=True):
     new_payment_status: str | None = Field(default=None, max_length=50)
     old_total: Decimal | None = Field(default=None, max_digits=10, decimal_places=2)
     new_total: Decimal | None = Field(default=None, max_digits=10, decimal_places=2)
-    changed_at: datetime = Field(default_factory=get_datetime_utc)
+    changed_at: datetime = Field(default_factory=get_datetime_utc, primary_key=True)
     changed_by: str = Field(default="", max_length=100)
+
+
+class SalesDaily(SQLModel, table=True):
+    """Daily sales rollup per status, folded periodically from sales_daily_delta."""
+    __tablename__ = "sales_daily"
+
+    day: date = Field(primary_key=True)
+    status: OrderStatus = Field(primary_key=True, sa_type=_sa_enum(OrderStatus, "orderstatus"))
+    payment_status: PaymentStatus = Field(
+        primary_key=True, sa_type=_sa_enum(PaymentStatus, "paymentstatus")
+    )
+    order_count: int = Field(default=0, sa_type=sa.BigInteger)
+    revenue: Decimal = Field(default=Decimal("0"), max_digits=14, decimal_places=2)
+    item_count: int = Field(default=0, sa_type=sa.BigInteger)
+
+
+class SalesDailyDelta(SQLModel, table=True):
+    """Append-only sales_daily changes written by the triggers on order and orderdetail."""
+    __tablename__ = "sales_daily_delta"
+
+    id: int | None = Field(default=None, primary_key=True, sa_type=sa.BigInteger)
+    day: date
+    status: OrderStatus = Field(sa_type=_sa_enum(OrderStatus, "orderstatus"))
+    payment_status: PaymentStatus = Field(sa_type=_sa_enum(PaymentStatus, "paymentstatus"))
+    order_count: int = Field(default=0, sa_type=sa.BigInteger)
+    revenue: Decimal = Field(default=Decimal("0"), max_digits=14, decimal_places=2)
+    item_count: int = Field(default=0, sa_type=sa.BigInteger)
+
+
+class BestSeller(SQLModel, table=True):
+    """Read-only mapping of the mv_best_sellers materialized view."""
+    __tablename__ = "mv_best_sellers"
+    # Alembic no lo trata como tabla (ver include_object en alembic/env.py)
+    __table_args__ = {"info": {"is_view": True}}
+
+    day: date = Field(primary_key=True)
+    product_id: int = Field(primary_key=True)
+    variant_name: str = Field(primary_key=True, max_length=100)
+    category_id: int
+    quantity: int = Field(sa_type=sa.BigInteger)
+
+
+class MaterializedViewRefresh(SQLModel, table=True):
+    """Last successful refresh of each materialized view."""
+    __tablename__ = "materialized_view_refresh"
+
+    view_name: str = Field(primary_key=True, max_length=63)
+    refreshed_at: datetime
+
+
+class ProductRelated(SQLModel, table=True):
+    """Top-K products most often bought together with a product."""
+    __tablename__ = "product_related"
+
+    product_id: int = Field(foreign_key="product.id", primary_key=True, ondelete="CASCADE")
+    rank: int = Field(primary_key=True)
+    related_product_id: int = Field(foreign_key="product.id", ondelete="CASCADE")
+    score: float
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """Stored response of a request sent with an ``Idempotency-Key`` header.
+
+    Keys are scoped to the caller (``client:<id>``, ``user:<id>`` or
+    ``anonymous``) so one caller's key never replays another's response.
+    """
+    __tablename__ = "idempotency_key"
+
+    scope: str = Field(primary_key=True, max_length=64)
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(max_length=64)
+    status_code: int
+    response_body: str
+    created_at: datetime = Field(default_factory=get_datetime_utc)
+    expires_at: datetime = Field(index=True)
+
+
+class EmailOutbox(SQLModel, table=True):
+    """Email queued in the request transaction and sent by a background job."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        sa.Index(
+            "ix_email_outbox_pending", "next_attempt_at", "id",
+            postgresql_where=sa.text("status = 'pending'"),
+        ),
+        sa.Index("ix_email_outbox_batch_key_id", "batch_key", "id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True, sa_type=sa.BigInteger)
+    sender: str = Field(max_length=255)
+    to_email: str = Field(max_length=255)
+    subject: str = Field(max_length=255)
+    html: str
+    status: EmailStatus = Field(default=EmailStatus.PENDING, sa_type=sa.String(10))
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=get_datetime_utc)
+    last_error: str | None = Field(default=None)
+    # Lote al que pertenece desde el primer intento de envío; los reintentos
+    # mandan exactamente el mismo lote con la misma llave de idempotencia
+    batch_key: str | None = Field(default=None, max_length=64)
+    created_at: datetime = Field(default_factory=get_datetime_utc)
+    sent_at: datetime | None = Field(default=None)
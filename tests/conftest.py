@@ -0,0 +1,89 @@
+import os
+
+# Settings() exige estas variables; los tests usan SQLite en memoria
+for name, value in {
+    "DATABASE_URL": "sqlite://",
+    "JWT_SECRET": "test-jwt-secret-0123456789abcdef",
+    "JWT_REFRESH_SECRET": "test-jwt-refresh-secret-0123456789abcdef",
+    "JWT_EMAIL_SECRET": "test-jwt-email-secret-0123456789abcdef",
+    "JWT_EMAIL_REFRESH_SECRET": "test-jwt-email-refresh-secret-0123456789abcdef",
+    "JWT_PASSWORD_RESET_SECRET": "test-jwt-password-reset-secret-0123456789abcdef",
+    "RESEND_API_KEY": "test",
+    "VERIFY_EMAIL": "test@example.com",
+    "RESET_PASSWORD_EMAIL": "test@example.com",
+    "FRONTEND_HOST": "http://localhost",
+}.items():
+    os.environ.setdefault(name, value)
+
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "postgres: necesita una base Postgres migrada en TEST_POSTGRES_URL "
+        "(se omite si no está definida)",
+    )
+
+
+@pytest.fixture
+def make_session():
+    # Crea una sesión sobre una base SQLite en memoria nueva con solo las
+    # tablas pedidas; la lista devuelta recibe cada sentencia ejecutada
+    engines = []
+
+    def make(*models) -> tuple[Session, list[str]]:
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        engines.append(engine)
+        tickets = itertools.count(1)
+
+        @event.listens_for(engine, "connect")
+        def register_functions(dbapi_connection, connection_record):
+            # En Postgres la columna order.ticket_number usa esta función
+            # como default (migración 0007); aquí se imita con un contador
+            dbapi_connection.create_function(
+                "fn_next_ticket_number", 0, lambda: f"TK-{next(tickets):04d}"
+            )
+
+        SQLModel.metadata.create_all(engine, tables=[m.__table__ for m in models])
+        statements: list[str] = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        return Session(engine), statements
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def api_client():
+    # Cliente HTTP de la app con get_db (y opcionalmente el cliente
+    # autenticado) apuntando a la sesión de make_session
+    from app.core.db import get_db
+    from app.core.deps import get_current_client
+    from app.main import app
+
+    def make(db: Session, client=None) -> TestClient:
+        def override_get_db():
+            with Session(db.get_bind()) as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        if client is not None:
+            app.dependency_overrides[get_current_client] = lambda: client
+        return TestClient(app)
+
+    yield make
+    app.dependency_overrides.clear()
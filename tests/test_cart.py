@@ -0,0 +1,150 @@
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from app.api.routes.clients import CartItemData
+from app.models import (
+    Category,
+    Client,
+    ClientCartItem,
+    Order,
+    OrderDetail,
+    Product,
+    ProductVariant,
+)
+
+CART_TABLES = (Client, ClientCartItem)
+CHECKOUT_TABLES = (*CART_TABLES, Category, Product, ProductVariant, Order, OrderDetail)
+
+
+def _client(db) -> Client:
+    client = Client(
+        email="ana@example.com", name="Ana", phone="+527331361624", password_hash="x"
+    )
+    db.add(client)
+    db.commit()
+    db.refresh(client)
+    return client
+
+
+def _cart_item(**overrides) -> dict:
+    return {
+        "product_id": "1",
+        "product_name": "Concha",
+        "product_price": 10.0,
+        "product_image": "concha.jpg",
+        "quantity": 1,
+    } | overrides
+
+
+@pytest.mark.parametrize("quantity", [0, -5])
+def test_cart_item_quantity_must_be_positive(quantity):
+    with pytest.raises(ValidationError):
+        CartItemData.model_validate(_cart_item(quantity=quantity))
+
+
+def test_sync_cart_rejects_non_positive_quantity(make_session, api_client):
+    db, _ = make_session(*CART_TABLES)
+    with db:
+        client = _client(db)
+        http = api_client(db, client)
+        response = http.put("/clients/cart", json={"items": [_cart_item(quantity=0)]})
+    assert response.status_code == 422
+
+
+def test_cart_item_quantity_check_constraint(make_session):
+    db, _ = make_session(*CART_TABLES)
+    with db:
+        client = _client(db)
+        db.add(ClientCartItem(client_id=client.id, **_cart_item(quantity=0)))
+        with pytest.raises(IntegrityError):
+            db.commit()
+
+
+def _catalog(db) -> tuple[ProductVariant, ProductVariant]:
+    category = Category(name="Pan")
+    db.add(category)
+    db.flush()
+    product = Product(category_id=category.id, name="Concha")
+    product.variants = [
+        ProductVariant(name="Chica", price=Decimal("10.00")),
+        ProductVariant(name="Grande", price=Decimal("15.50")),
+    ]
+    db.add(product)
+    db.commit()
+    return tuple(sorted(product.variants, key=lambda v: v.id))
+
+
+@pytest.fixture
+def checkout(make_session, api_client):
+    # Cliente con dos variantes en el carrito; el precio de la grande quedó viejo
+    db, statements = make_session(*CHECKOUT_TABLES)
+    client = _client(db)
+    small_id, large_id = (v.id for v in _catalog(db))
+    db.add_all(
+        [
+            ClientCartItem(client_id=client.id, **_cart_item(product_id=str(small_id), quantity=2)),
+            ClientCartItem(
+                client_id=client.id,
+                **_cart_item(product_id=str(large_id), product_price=14.0),
+            ),
+        ]
+    )
+    db.commit()
+    # El cliente autenticado llega a la petición ya cargado y sin sesión
+    db.refresh(client)
+    db.expunge_all()
+    http = api_client(db, client)
+    yield db, statements, http, (small_id, large_id)
+    db.close()
+
+
+def test_checkout_revalidates_prices_in_fixed_statements(checkout):
+    db, statements, http, (small_id, large_id) = checkout
+    statements.clear()
+    response = http.post("/clients/cart/checkout", json={"payment_method": "efectivo"})
+
+    assert response.status_code == 201
+    body = response.json()
+    order = body["order"]
+    assert order["ticket_number"].startswith("TK-")
+    assert order["phone"] == "7331361624"
+    assert Decimal(order["total"]) == Decimal("35.50")
+    assert sorted((d["variant_name"], d["quantity"], d["unit_price"]) for d in order["details"]) == [
+        ("Chica", 2, "10.00"),
+        ("Grande", 1, "15.50"),
+    ]
+    assert body["price_corrections"] == [
+        {
+            "product_id": str(large_id),
+            "product_name": "Concha",
+            "cart_price": "14.00",
+            "price": "15.50",
+        }
+    ]
+    # DELETE ... RETURNING, SELECT de variantes, INSERT de la órden y de sus detalles
+    assert [s.split()[0] for s in statements] == ["DELETE", "SELECT", "INSERT", "INSERT"]
+    assert db.exec(select(ClientCartItem)).all() == []
+
+
+def test_checkout_of_an_empty_cart_is_rejected(checkout):
+    db, _, http, _ = checkout
+    assert http.post("/clients/cart/checkout", json={"payment_method": "efectivo"}).status_code == 201
+    retry = http.post("/clients/cart/checkout", json={"payment_method": "efectivo"})
+    assert retry.status_code == 400
+    assert len(db.exec(select(Order)).all()) == 1
+
+
+def test_checkout_with_a_missing_variant_keeps_the_cart(checkout):
+    db, _, http, _ = checkout
+    client_id = db.exec(select(Client.id)).one()
+    db.add(ClientCartItem(client_id=client_id, **_cart_item(product_id="999")))
+    db.commit()
+
+    response = http.post("/clients/cart/checkout", json={"payment_method": "efectivo"})
+    assert response.status_code == 404
+    assert len(db.exec(select(ClientCartItem)).all()) == 3
+    assert db.exec(select(Order)).all() == []
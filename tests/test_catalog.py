@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+import pytest
+
+from app.core import catalog
+from app.core.catalog_cache import load_snapshot
+from app.models import CatalogChange, Category, Product, ProductVariant
+
+
+def _add_products(db, count: int) -> None:
+    category = Category(name="Pan")
+    db.add(category)
+    db.flush()
+    for i in range(count):
+        product = Product(category_id=category.id, name=f"Producto {i}")
+        product.variants = [
+            ProductVariant(name="Chica", price=Decimal("10.00")),
+            ProductVariant(name="Grande", price=Decimal("15.00")),
+        ]
+        db.add(product)
+    db.commit()
+
+
+def _count_queries(make_session, products: int, load) -> int:
+    db, statements = make_session(CatalogChange, Category, Product, ProductVariant)
+    with db:
+        _add_products(db, products)
+        db.expunge_all()
+        statements.clear()
+        load(db)
+        return len(statements)
+
+
+@pytest.mark.parametrize(
+    "load",
+    [
+        lambda db: [p.variants for p in catalog.list_products(db, active_only=False)],
+        lambda db: load_snapshot(db, version=1),
+    ],
+    ids=["list_products", "load_snapshot"],
+)
+def test_query_count_does_not_grow_with_catalog(make_session, load):
+    small = _count_queries(make_session, 5, load)
+    large = _count_queries(make_session, 50, load)
+    assert small == large
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from sqlmodel import select
+
+from app.core import email
+from app.models import EmailOutbox, EmailStatus, get_datetime_utc
+
+
+class RecordingTransport:
+    def __init__(self, fail: bool = False, reject: tuple[str, ...] = ()):
+        self.fail = fail
+        self.reject = reject
+        self.batches: list[tuple[str, list[str]]] = []
+
+    def send_batch(self, messages, idempotency_key):
+        self.batches.append((idempotency_key, [m.to for m in messages]))
+        if self.fail:
+            raise RuntimeError("resend down")
+        if any(m.to in self.reject for m in messages):
+            raise email.BatchRejected("invalid `to` field")
+
+
+def _enqueue(db, *ids: int) -> None:
+    # SQLite no autoincrementa llaves BIGINT: los ids se asignan a mano
+    for i in ids:
+        db.add(EmailOutbox(id=i, sender="a@b.c", to_email=f"{i}@b.c", subject="s", html="h"))
+    db.commit()
+
+
+def _make_due(db) -> None:
+    for row in db.exec(select(EmailOutbox)).all():
+        row.next_attempt_at = get_datetime_utc() - timedelta(seconds=1)
+        db.add(row)
+    db.commit()
+
+
+def test_failed_batch_is_retried_with_the_same_key(make_session):
+    db, _ = make_session(EmailOutbox)
+    with db:
+        _enqueue(db, 1, 2, 3)
+        failing = RecordingTransport(fail=True)
+        assert email.send_pending(db, failing, batch_size=2) == 0
+        [(key, recipients)] = failing.batches
+        assert recipients == ["1@b.c", "2@b.c"]
+        assert len(key) == len("email-outbox-") + 64
+
+        # Un correo nuevo que llega antes del reintento no cambia el lote
+        _enqueue(db, 4)
+        _make_due(db)
+        working = RecordingTransport()
+        assert email.send_pending(db, working, batch_size=2) == 4
+        assert working.batches[0] == (key, ["1@b.c", "2@b.c"])
+        assert working.batches[1][1] == ["3@b.c", "4@b.c"]
+        assert working.batches[1][0] != key
+
+        rows = db.exec(select(EmailOutbox).order_by(EmailOutbox.id)).all()
+        assert [(r.status, r.attempts) for r in rows] == [
+            (EmailStatus.SENT, 2),
+            (EmailStatus.SENT, 2),
+            (EmailStatus.SENT, 1),
+            (EmailStatus.SENT, 1),
+        ]
+
+
+def test_batch_key_length_does_not_grow_with_batch_size(make_session):
+    db, _ = make_session(EmailOutbox)
+    with db:
+        _enqueue(db, *range(1, 101))
+        transport = RecordingTransport()
+        assert email.send_pending(db, transport, batch_size=100) == 100
+        [(key, recipients)] = transport.batches
+        assert len(recipients) == 100
+        assert len(key) == len("email-outbox-") + 64
+
+
+def test_rejected_batch_is_split_and_only_the_bad_email_fails(make_session):
+    db, _ = make_session(EmailOutbox)
+    with db:
+        _enqueue(db, 1, 2, 3)
+        transport = RecordingTransport(reject=("2@b.c",))
+        assert email.send_pending(db, transport, batch_size=3) == 2
+        assert [recipients for _, recipients in transport.batches] == [
+            ["1@b.c", "2@b.c", "3@b.c"],
+            ["1@b.c"],
+            ["2@b.c"],
+            ["3@b.c"],
+        ]
+
+        rows = db.exec(select(EmailOutbox).order_by(EmailOutbox.id)).all()
+        assert [(r.status, r.attempts) for r in rows] == [
+            (EmailStatus.SENT, 1),
+            (EmailStatus.FAILED, 1),
+            (EmailStatus.SENT, 1),
+        ]
+
+
+def test_memory_transport_is_shared(monkeypatch):
+    monkeypatch.setattr(email.settings, "EMAIL_TRANSPORT", "memory")
+    assert email.get_transport() is email.get_transport()
@@ -0,0 +1,79 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import BaseModel
+from sqlmodel.sql.sqltypes import UTCDateTime
+
+from app.core import idempotency
+from app.core.deps import get_idempotency_scope
+from app.core.security import create_access_token, create_admin_access_token
+from app.models import IdempotencyKey, get_datetime_utc
+
+SCOPE = "client:1"
+
+
+class Body(BaseModel):
+    value: int
+
+
+@pytest.fixture
+def naive_datetimes(monkeypatch):
+    # Con columnas timestamp sin zona horaria (y versiones de SQLModel que
+    # las mapean a DateTime) las fechas se leen sin tzinfo
+    monkeypatch.setattr(UTCDateTime, "process_result_value", lambda self, value, dialect: value)
+
+
+def _remember(make_session, expires_in: timedelta):
+    db, _ = make_session(IdempotencyKey)
+    with db:
+        idempotency.remember(db, SCOPE, "key-1", "hash-1", 201, Body(value=1))
+        db.get(IdempotencyKey, (SCOPE, "key-1")).expires_at = get_datetime_utc() + expires_in
+        db.commit()
+    return db
+
+
+def test_replay_row_read_back_from_database(make_session):
+    db = _remember(make_session, timedelta(hours=1))
+    with db:
+        response = idempotency.replay(db, SCOPE, "key-1", "hash-1")
+    assert response.status_code == 201
+    assert response.body == b'{"value":1}'
+
+
+def test_replay_naive_expires_at(make_session, naive_datetimes):
+    db = _remember(make_session, timedelta(hours=1))
+    with db:
+        assert db.get(IdempotencyKey, (SCOPE, "key-1")).expires_at.tzinfo is None
+        response = idempotency.replay(db, SCOPE, "key-1", "hash-1")
+    assert response.status_code == 201
+
+
+def test_replay_expired_naive_expires_at(make_session, naive_datetimes):
+    db = _remember(make_session, timedelta(hours=-1))
+    with db:
+        assert idempotency.replay(db, SCOPE, "key-1", "hash-1") is None
+        assert db.get(IdempotencyKey, (SCOPE, "key-1")) is None
+
+
+def test_key_does_not_replay_across_scopes(make_session):
+    db = _remember(make_session, timedelta(hours=1))
+    with db:
+        assert idempotency.replay(db, "client:2", "key-1", "hash-1") is None
+        assert idempotency.replay(db, "anonymous", "key-1", "hash-1") is None
+        assert idempotency.replay(db, SCOPE, "key-1", "hash-1") is not None
+
+
+def test_scope_follows_the_bearer_token():
+    client_id, user_id = uuid.uuid4(), uuid.uuid4()
+
+    def scope(token: str | None) -> str:
+        if token is None:
+            return get_idempotency_scope(None)
+        return get_idempotency_scope(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+    assert scope(create_access_token(client_id)) == f"client:{client_id}"
+    assert scope(create_admin_access_token(user_id)) == f"user:{user_id}"
+    assert scope("not-a-token") == "anonymous"
+    assert scope(None) == "anonymous"
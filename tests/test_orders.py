@@ -0,0 +1,155 @@
+import os
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+from sqlmodel import Session, create_engine, delete, select
+
+from app.api.routes.orders import OrderBulkUpdate
+from app.models import (
+    Category,
+    Client,
+    Order,
+    OrderAudit,
+    OrderDetail,
+    PaymentStatus,
+    Product,
+    ProductVariant,
+    get_datetime_utc,
+)
+
+ORDER_TABLES = (Client, Category, Product, ProductVariant, Order, OrderDetail)
+
+
+def _product(db) -> Product:
+    category = Category(name="Pan")
+    db.add(category)
+    db.flush()
+    product = Product(category_id=category.id, name="Concha")
+    product.variants = [ProductVariant(name="Chica", price=Decimal("10.00"))]
+    db.add(product)
+    db.commit()
+    db.refresh(product)
+    return product
+
+
+def _order_body(product_id: int) -> dict:
+    return {
+        "client_name": "Ana",
+        "phone": "7331361624",
+        "payment_method": "efectivo",
+        "details": [
+            {"product_id": product_id, "variant_name": "Chica", "quantity": 1, "unit_price": "10.00"}
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"order_ids": [1], "status": None, "payment_status": "pagado"},
+        {"order_ids": [1], "payment_status": None},
+    ],
+)
+def test_bulk_update_rejects_explicit_null(body):
+    with pytest.raises(ValidationError):
+        OrderBulkUpdate.model_validate(body)
+
+
+def test_bulk_update_values_only_include_given_fields():
+    data = OrderBulkUpdate.model_validate({"order_ids": [1], "payment_status": "pagado"})
+    assert data.model_dump(exclude_none=True, exclude={"order_ids"}) == {
+        "payment_status": PaymentStatus.PAID
+    }
+
+
+def test_resume_replays_late_commits_before_last_event_id(make_session, monkeypatch):
+    from app.api.routes import orders
+
+    db, _ = make_session(OrderAudit)
+    monkeypatch.setattr(orders, "engine", db.get_bind())
+    now = get_datetime_utc()
+    with db:
+        # El 2 tomó su id antes que el 3 pero se confirmó después
+        for audit_id, age in [(1, 600), (2, 5), (3, 4), (4, 1)]:
+            db.add(
+                OrderAudit(
+                    id=audit_id,
+                    order_id=audit_id,
+                    action="INSERT",
+                    changed_at=now - timedelta(seconds=age),
+                )
+            )
+        db.commit()
+
+    assert [e.id for e in orders._load_overlap(3)] == [2]
+    assert [e.id for e in orders._load_backlog(3)] == [4]
+    assert orders._load_overlap(99) == []
+
+
+def test_create_order_takes_ticket_number_from_insert_returning(make_session, api_client):
+    db, statements = make_session(*ORDER_TABLES)
+    with db:
+        product_id = _product(db).id
+        http = api_client(db)
+        statements.clear()
+        first = http.post("/orders/", json=_order_body(product_id))
+        second = http.post("/orders/", json=_order_body(product_id))
+
+    assert first.status_code == second.status_code == 201
+    assert first.json()["ticket_number"] != second.json()["ticket_number"]
+    # Nada lee "order" antes de insertar (ni MAX(id) ni el último ticket):
+    # el número sale del default del servidor en el RETURNING del INSERT
+    inserts = [i for i, s in enumerate(statements) if s.startswith('INSERT INTO "order"')]
+    assert len(inserts) == 2
+    for i in inserts:
+        assert "ticket_number" in statements[i].split("RETURNING")[1]
+    first_request = statements[: inserts[0]]
+    assert not [s for s in first_request if 'FROM "order"' in s]
+    assert not [s for s in statements if "max(" in s.lower()]
+
+
+@pytest.mark.postgres
+def test_concurrent_checkouts_never_share_a_ticket_number(api_client):
+    # Contra una base Postgres con todas las migraciones aplicadas
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL no está definida")
+    engine = create_engine(url)
+    workers, orders_per_worker = 16, 25
+
+    with Session(engine) as db:
+        product_id = _product(db).id
+        http = api_client(db)
+        start = threading.Barrier(workers)
+        statuses: list[int] = []
+        tickets: list[str] = []
+
+        def checkout():
+            start.wait()
+            for _ in range(orders_per_worker):
+                response = http.post("/orders/", json=_order_body(product_id))
+                statuses.append(response.status_code)
+                if response.status_code == 201:
+                    tickets.append(response.json()["ticket_number"])
+
+        threads = [threading.Thread(target=checkout) for _ in range(workers)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            order_ids = select(OrderDetail.order_id).where(OrderDetail.product_id == product_id)
+            db.exec(delete(Order).where(Order.id.in_(order_ids)))
+            product = db.get(Product, product_id)
+            category = db.get(Category, product.category_id)
+            db.delete(product)
+            db.delete(category)
+            db.commit()
+            engine.dispose()
+
+    assert statuses == [201] * (workers * orders_per_worker)
+    assert len(set(tickets)) == len(tickets)
@@ -0,0 +1,50 @@
+from datetime import date
+from decimal import Decimal
+
+from app.core.deps import get_current_user
+from app.main import app
+from app.models import OrderStatus, PaymentStatus, SalesDaily, SalesDailyDelta
+
+SALES_TABLES = (SalesDaily, SalesDailyDelta)
+
+
+def _bucket(model, day: int, orders: int, revenue: str, items: int, **extra):
+    return model(
+        day=date(2026, 10, day),
+        status=OrderStatus.DELIVERED,
+        payment_status=PaymentStatus.PAID,
+        order_count=orders,
+        revenue=Decimal(revenue),
+        item_count=items,
+        **extra,
+    )
+
+
+def test_sales_timeseries_includes_unfolded_deltas(make_session, api_client):
+    # Lo que los triggers dejaron en sales_daily_delta cuenta aunque el
+    # fold todavía no haya corrido, incluso en días sin fila en sales_daily
+    db, _ = make_session(*SALES_TABLES)
+    with db:
+        db.add_all([
+            _bucket(SalesDaily, 1, 2, "30", 3),
+            _bucket(SalesDailyDelta, 1, 1, "10", 1, id=1),
+            _bucket(SalesDailyDelta, 1, -1, "-5", 0, id=2),
+            _bucket(SalesDailyDelta, 2, 1, "7", 2, id=3),
+            _bucket(SalesDailyDelta, 9, 1, "9", 1, id=4),
+        ])
+        db.commit()
+
+        http = api_client(db)
+        app.dependency_overrides[get_current_user] = lambda: None
+        response = http.get(
+            "/reports/sales-timeseries", params={"from": "2026-10-01", "to": "2026-10-02"}
+        )
+
+    assert response.status_code == 200
+    assert [
+        (point["period"], point["order_count"], Decimal(point["revenue"]), point["item_count"])
+        for point in response.json()
+    ] == [
+        ("2026-10-01", 2, Decimal("35"), 4),
+        ("2026-10-02", 1, Decimal("7"), 2),
+    ]